@@ -0,0 +1,7 @@
+# tests/conftest.py
+"""Модули проверяющего лежат плоско в tools/ и импортируют друг друга по имени"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "tools"))
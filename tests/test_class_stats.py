@@ -0,0 +1,37 @@
+# tests/test_class_stats.py
+import json
+
+from class_stats import ClassStats, iter_submissions
+
+CONFIG = {"tasks": [{"id": "task_01", "name": "Задача 1", "file": "task_01.py",
+                     "max_score": 10}]}
+
+
+def _graded(student, score):
+    return {"student": student, "path": f"/s/{student}", "total": score, "max_total": 10,
+            "results": {"task_01": {"tests": [
+                {"name": "Тест", "status": "pass" if score else "fail", "score": score,
+                 "output": "ok"}]}}}
+
+
+def test_resumed_log_counts_each_student_once(tmp_path):
+    # Журнал --resume: ошибка, затем повторная попытка; недописанная строка в конце
+    log = tmp_path / "grades.jsonl"
+    lines = [_graded("anna", 10),
+             {"student": "boris", "path": "/s/boris", "error": "Процесс проверки аварийно завершился"},
+             _graded("vera", 0),
+             _graded("boris", 10)]
+    log.write_text("".join(json.dumps(record) + "\n" for record in lines) + '{"student": "gl')
+    # Более поздний журнал переопределяет прежнюю запись
+    later = tmp_path / "later.jsonl"
+    later.write_text(json.dumps(_graded("vera", 10)) + "\n")
+
+    stats = ClassStats(CONFIG)
+    for results in iter_submissions([str(log), str(later)], CONFIG):
+        if results is None:
+            stats.add_error()
+        else:
+            stats.add_submission(results)
+
+    assert (stats.submissions, stats.errors) == (3, 0)
+    assert stats.tasks["task_01"].histogram == {10: 3}
@@ -0,0 +1,60 @@
+# tests/test_differential.py
+import time
+
+import pytest
+
+from differential import run_differential_test
+from runner import SubprocessRunner
+
+TEST = {
+    "name": "Случайные радиусы",
+    "comparison_method": "differential",
+    "generator": "reference_tasks:task_02_inputs",
+    "reference": "reference_tasks:task_02_reference",
+    "count": 40,
+    "seed": 2,
+    "timeout": 0.3,
+    "max_score": 10
+}
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_stops_after_first_timeout(tmp_path, jobs):
+    (tmp_path / "task_02.py").write_text("while True:\n    pass\n")
+    started = time.monotonic()
+    entry = run_differential_test(SubprocessRunner(), "task_02.py", TEST, str(tmp_path), jobs)
+    elapsed = time.monotonic() - started
+
+    assert entry["status"] == "fail" and entry["score"] == 0
+    assert entry["output"].startswith("TIMEOUT на вводе")
+    assert f"выполнено {jobs} из 40" in entry["output"]
+    assert entry["counterexample"]["output"] == "TIMEOUT"
+    # Без остановки это 40 таймаутов
+    assert elapsed < 10 * TEST["timeout"]
+
+
+def test_reference_solution_passes(tmp_path):
+    (tmp_path / "task_02.py").write_text(
+        "for _ in range(2):\n"
+        "    print(f'{3.14 * float(input()) ** 2:.2f}')\n")
+    entry = run_differential_test(SubprocessRunner(), "task_02.py", TEST, str(tmp_path), 2)
+    assert entry["status"] == "pass", entry["output"]
+
+
+def test_numeric_case_comparison(tmp_path):
+    # Лишние знаки после запятой
+    (tmp_path / "task_02.py").write_text(
+        "for _ in range(2):\n"
+        "    print(f'{3.14 * float(input()) ** 2:.4f}')\n")
+    exact = dict(TEST, timeout=5)
+    entry = run_differential_test(SubprocessRunner(), "task_02.py", exact, str(tmp_path))
+    assert entry["status"] == "fail"
+    numeric = dict(exact, case_comparison="numeric", abs_tol=0.01)
+    entry = run_differential_test(SubprocessRunner(), "task_02.py", numeric, str(tmp_path))
+    assert entry["status"] == "pass", entry["output"]
+
+    (tmp_path / "task_02.py").write_text(
+        "for _ in range(2):\n"
+        "    print(f'{3.15 * float(input()) ** 2:.2f}')\n")
+    entry = run_differential_test(SubprocessRunner(), "task_02.py", numeric, str(tmp_path))
+    assert entry["status"] == "fail"
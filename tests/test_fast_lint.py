@@ -0,0 +1,41 @@
+# tests/test_fast_lint.py
+from fast_lint import lint_source
+
+
+def codes(source):
+    return [(m["line"], m["code"]) for m in lint_source(source)["messages"]
+            if m["code"].startswith("F")]
+
+
+def test_star_import_suppresses_undefined_names():
+    source = '"""Площадь круга"""\nfrom math import *\nprint(pi)\n'
+    assert codes(source) == [(2, "F403"), (3, "F405")]
+    assert lint_source(source)["score"] > 0
+
+
+def test_star_import_seen_from_nested_scopes():
+    source = ("from math import *\n\n\n"
+              "def area(radius):\n"
+              "    return pi * radius ** 2\n")
+    assert codes(source) == [(1, "F403"), (5, "F405")]
+
+
+def test_undefined_name_without_star_import():
+    assert codes("print(pi)\n") == [(1, "F821")]
+
+
+def test_implicit_names():
+    source = ("class Base:\n"
+              "    label = __module__ + __qualname__\n\n"
+              "    def name(self):\n"
+              "        return __class__.__name__\n")
+    assert codes(source) == []
+
+
+def test_augmented_assignment_uses_the_variable():
+    source = ("def count(items):\n"
+              "    total = 0\n"
+              "    for _ in items:\n"
+              "        total += 1\n"
+              "    unused = 0\n")
+    assert codes(source) == [(5, "F841")]
@@ -0,0 +1,71 @@
+# tests/test_grade_server.py
+import io
+import json
+import tarfile
+import threading
+import zipfile
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import grade_server
+from grade_server import Handler, extract_archive
+
+
+def _zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _tar(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("kind, pack", [("zip", _zip), ("tar", _tar)])
+def test_extract_archive_limits_unpacked_size(tmp_path, monkeypatch, kind, pack):
+    monkeypatch.setattr(grade_server, "MAX_EXTRACTED_BYTES", 1000)
+    # Нули сжимаются во много раз: сам архив намного меньше лимита
+    data = pack({"task_01.py": b"0" * 600, "task_02.py": b"0" * 600})
+    assert len(data) < 1000
+    with pytest.raises(ValueError):
+        extract_archive(data, kind, str(tmp_path))
+    assert not list(tmp_path.iterdir())
+
+    root = extract_archive(pack({"task_01.py": b"print(1)\n"}), kind, str(tmp_path))
+    assert (tmp_path / "task_01.py").read_bytes() == b"print(1)\n" and root == str(tmp_path)
+
+
+class FakeService:
+    workdir = None
+
+    def submit(self, path, student=None, priority=None, cleanup=None):
+        return "job"
+
+
+@pytest.mark.parametrize("body", [b"[]", b"1", b'"path"', b'{"path": 5}',
+                                  b'{"path": ".", "priority": []}'])
+def test_post_rejects_malformed_json(body):
+    Handler.service = FakeService()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+        connection.request("POST", "/submissions", body,
+                           {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        assert response.status == 400
+        assert "error" in json.loads(response.read())
+    finally:
+        server.shutdown()
+        server.server_close()
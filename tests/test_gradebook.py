@@ -0,0 +1,28 @@
+# tests/test_gradebook.py
+from gradebook import Gradebook
+
+CONFIG = {"tasks": [{"id": "task_01", "name": "Задача 1", "file": "task_01.py", "max_score": 10,
+                     "tests": [{"name": "Тест", "max_score": 10}]}]}
+
+
+def _record(student, score, graded_at):
+    return {"student": student, "commit": f"c{score}", "graded_at": graded_at,
+            "total": score, "max_total": 10,
+            "results": {"task_01": {"tests": [
+                {"name": "Тест", "status": "pass" if score else "fail", "score": score,
+                 "output": ""}]}}}
+
+
+def test_older_shard_imported_later_does_not_become_latest(tmp_path):
+    book = Gradebook(str(tmp_path / "gradebook.db"))
+    try:
+        # Сначала новый шард, потом повторно загруженный старый
+        book.record_batch([_record("anna", 10, 2000.0), _record("boris", 0, 2000.0)], CONFIG)
+        book.record_batch([_record("anna", 0, 1000.0), _record("boris", 10, 3000.0)], CONFIG)
+
+        assert book.leaderboard() == [("anna", 10, 10), ("boris", 10, 10)]
+        assert book.latest_results("anna")["task_01"]["tests"][0]["score"] == 10
+        assert [row[0] for row in book.history(student="anna")] == [1000.0, 2000.0]
+        assert book.pass_rates() == [("task_01", "Тест", 2, 2)]
+    finally:
+        book.close()
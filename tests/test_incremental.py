@@ -0,0 +1,64 @@
+# tests/test_incremental.py
+import subprocess
+
+import incremental
+
+CONFIG = {"tasks": [{"id": "task_01", "file": "task_01.py"}]}
+
+
+def _git(root, *args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                   cwd=root, check=True, capture_output=True)
+
+
+def test_local_changes_ignore_results_but_not_task_files(tmp_path):
+    (tmp_path / "task_01.py").write_text("print(1)\n")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", "task_01.py")
+    _git(tmp_path, "commit", "-q", "-m", "init")
+
+    # Результаты прогона сами по себе не делают дерево «грязным»
+    (tmp_path / "results").mkdir()
+    (tmp_path / "results" / "task_01.json").write_text("{}")
+    assert not incremental.has_local_changes(CONFIG, str(tmp_path))
+
+    (tmp_path / "task_01.py").write_text("print(2)\n")
+    assert incremental.has_local_changes(CONFIG, str(tmp_path))
+
+
+def test_clear_state_forces_full_run(tmp_path):
+    results_dir = str(tmp_path / "results")
+    incremental.save_state("abc", results_dir)
+    assert incremental.load_state(results_dir) == {"commit": "abc"}
+
+    incremental.clear_state(results_dir)
+    incremental.clear_state(results_dir)
+    assert incremental.affected_tasks(CONFIG, results_dir, str(tmp_path)) is None
+
+
+def test_paths_with_spaces_and_cyrillic_are_matched(tmp_path):
+    config = {"tasks": [{"id": "task_01", "file": "задачи/task 01.py"},
+                        {"id": "task_02", "file": "новая задача.py"},
+                        {"id": "task_03", "file": "task_03.py"}]}
+    root = tmp_path / "repo"
+    (root / "задачи").mkdir(parents=True)
+    for task in config["tasks"][::2]:
+        (root / task["file"]).write_text("print(1)\n")
+    _git(root, "init", "-q")
+    _git(root, "add", ".")
+    _git(root, "commit", "-q", "-m", "init")
+    head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                          text=True).stdout.strip()
+
+    results_dir = tmp_path / "results"
+    incremental.save_state(head, str(results_dir))
+    for task in config["tasks"]:
+        (results_dir / f"{task['id']}.json").write_text("{}")
+    (root / "задачи" / "task 01.py").write_text("print(2)\n")
+    (root / "новая задача.py").write_text("print(3)\n")
+
+    # Изменённый файл с пробелом в пути и новый файл с кириллицей в имени
+    assert incremental.changed_paths(head, str(root)) == {"задачи/task 01.py",
+                                                          "новая задача.py"}
+    assert incremental.affected_tasks(config, str(results_dir), str(root)) == {"task_01",
+                                                                               "task_02"}
@@ -0,0 +1,40 @@
+# tests/test_refactor_rules.py
+from pathlib import Path
+
+from refactor_rules import check_task
+from test_refactor_task_01 import check_task_01
+
+
+def test_rules_come_from_passed_task(tmp_path):
+    (tmp_path / "task_01.py").write_text("x = input()\nprint(x * 2)\n")
+    task = {"id": "task_01_refactor", "file": "task_01.py",
+            "rules": [{"rule": "name_present", "name": "x"}]}
+    # По правилам .github/tasks.json имя x запрещено
+    assert check_task_01(str(tmp_path))[0] is False
+    assert check_task_01(str(tmp_path), task=task) == (True, "OK")
+    assert check_task("task_01_refactor", str(tmp_path), task=dict(task, rules=[]))[0] is True
+
+
+def test_missing_config_not_read_when_task_passed(tmp_path):
+    (tmp_path / "task_01.py").write_text("user_id = input()\n")
+    task = {"id": "task_01_refactor", "file": "task_01.py",
+            "rules": [{"rule": "name_absent", "name": "user_id", "message": "нет"}]}
+    assert check_task("task_01_refactor", str(tmp_path), config_path=tmp_path / "missing.json",
+                      task=task) == (False, "нет")
+
+
+def test_plugin_uses_grader_config(tmp_path):
+    from run_all_tests import run_refactor_plugin
+    from runner import ExecutionLedger, SubprocessRunner
+
+    (tmp_path / "task_01.py").write_text("x = input()\nprint(x * 2)\n")
+    task = {"id": "task_01_refactor", "file": "task_01.py", "max_score": 20,
+            "checker": str(Path(__file__).parent.parent / "tools" / "test_refactor_task_01.py"),
+            "rules": [{"rule": "output", "input": "ab", "expected_output": "abab"}]}
+    runner = ExecutionLedger(SubprocessRunner())
+    entry, _ = run_refactor_plugin(task, runner, str(tmp_path))
+    assert entry["score"] == 20
+    entry, _ = run_refactor_plugin(
+        dict(task, rules=[{"rule": "output", "input": "ab", "expected_output": "ab"}]),
+        runner, str(tmp_path))
+    assert entry["score"] == 0 and "diff" in entry
@@ -0,0 +1,21 @@
+# tests/test_report_summary.py
+from report_summary import build_summary, code_fence
+
+
+def test_code_fence_is_longer_than_backtick_runs():
+    assert code_fence("a - b") == "```"
+    assert code_fence("x ``` y `````") == "``````"
+
+
+def test_diff_with_backticks_stays_inside_its_block():
+    diff = "- ```\n+ ``\n  ````python"
+    config = {"tasks": [{"id": "task_01", "name": "Задача 1", "file": "task_01.py",
+                         "max_score": 10}]}
+    results = {"task_01": {"version": 1, "status": "fail", "max_score": 10, "tests": [
+        {"name": "Тест", "status": "fail", "score": 0, "output": "```", "diff": diff}]}}
+
+    lines = build_summary(config, results).splitlines()
+
+    start = lines.index("`````diff")
+    assert lines[start + 1:start + 4] == diff.splitlines()
+    assert lines[start + 4] == "`````"
@@ -0,0 +1,50 @@
+# tests/test_result_cache.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import result_cache
+from result_cache import ResultCache
+from run_all_tests import run_behavioral_test
+from runner import ExecutionLedger, SubprocessRunner
+
+TASK = {
+    "id": "task_01",
+    "file": "task_01.py",
+    "max_score": 10,
+    "tests": [{"name": "Эхо", "input": "hi", "expected_output": "hi",
+               "comparison_method": "exact", "max_score": 10}]
+}
+
+
+class OtherPython(SubprocessRunner):
+    """python3, который на запрос версии называет себя другим интерпретатором"""
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.executable = os.path.join(directory, "other-python")
+        with open(self.executable, "w") as f:
+            f.write('#!/bin/sh\n[ "$1" = -c ] && echo "Other 9.9" && exit 0\nexec python3 "$@"\n')
+        os.chmod(self.executable, 0o755)
+
+
+def _grade(tmp_path, runner):
+    cache = ResultCache(tmp_path / "cache")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        result = run_behavioral_test(TASK, ExecutionLedger(runner), executor,
+                                     str(tmp_path / "work"), cache)()
+    return result["tests"][0]
+
+
+def test_key_depends_on_interpreter_output_limit_and_version(tmp_path, monkeypatch):
+    (tmp_path / "work").mkdir()
+    (tmp_path / "work" / "task_01.py").write_text("print(input())\n")
+
+    first = _grade(tmp_path, SubprocessRunner())
+    assert first["status"] == "pass" and "cached" not in first
+    assert _grade(tmp_path, SubprocessRunner())["cached"] is True
+
+    assert "cached" not in _grade(tmp_path, SubprocessRunner(output_limit=1024))
+    assert "cached" not in _grade(tmp_path, OtherPython(str(tmp_path)))
+
+    monkeypatch.setattr(result_cache, "CACHE_VERSION", result_cache.CACHE_VERSION + 1)
+    assert "cached" not in _grade(tmp_path, SubprocessRunner())
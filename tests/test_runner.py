@@ -0,0 +1,23 @@
+# tests/test_runner.py
+import threading
+import time
+
+import runner
+from runner import SubprocessRunner
+
+
+def test_kill_all_stops_running_programs(tmp_path):
+    (tmp_path / "loop.py").write_text("while True:\n    pass\n")
+    results = []
+    thread = threading.Thread(target=lambda: results.append(
+        SubprocessRunner().run("loop.py", "", timeout=30, cwd=str(tmp_path))))
+    started = time.monotonic()
+    thread.start()
+    while not runner._live_groups and time.monotonic() - started < 5:
+        time.sleep(0.01)
+    runner.kill_all()
+    thread.join(10)
+
+    assert not thread.is_alive() and time.monotonic() - started < 10
+    assert results[0]["returncode"] != 0
+    assert not runner._live_groups
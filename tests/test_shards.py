@@ -0,0 +1,89 @@
+# tests/test_shards.py
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from grade_batch import load_checkpoint, shard_of
+from merge_shards import missing_shards, read_manifests, read_records, unfinished_students
+
+TOOLS = Path(__file__).resolve().parent.parent / "tools"
+
+CONFIG = {"tasks": [{
+    "id": "task_01",
+    "name": "Удвоение",
+    "file": "task_01.py",
+    "max_score": 10,
+    "tests": [{"name": "Тест", "input": "ab", "expected_output": "abab",
+               "comparison_method": "exact", "max_score": 10}]
+}]}
+
+
+def test_checkpoint_retries_error_records(tmp_path):
+    log = tmp_path / "grades.jsonl"
+    log.write_text(
+        json.dumps({"student": "ann", "total": 10}) + "\n" +
+        json.dumps({"student": "bob", "error": "упал"}) + "\n" +
+        json.dumps({"student": "eve", "error": "упал"}) + "\n" +
+        json.dumps({"student": "eve", "total": 0}) + "\n" +
+        '{"student": "tom", "tot')
+    assert load_checkpoint(str(log)) == {"ann", "eve"}
+    assert log.read_text().endswith('"total": 0}\n')
+
+
+def _classroom(root, count):
+    for i in range(count):
+        student = root / f"student{i}"
+        student.mkdir(parents=True)
+        body = "print(input() * 2)" if i % 2 else "print(input())"
+        (student / "task_01.py").write_text(body + "\n")
+
+
+def _batch(*args):
+    subprocess.run([sys.executable, str(TOOLS / "grade_batch.py"), *map(str, args)],
+                   check=True, capture_output=True)
+
+
+def test_sharded_merge_matches_single_run(tmp_path):
+    config = tmp_path / "tasks.json"
+    config.write_text(json.dumps(CONFIG))
+    _classroom(tmp_path / "class", 3)
+    count = 6
+    # Хотя бы один шард пустой
+    assert len({shard_of(f"student{i}", count) for i in range(3)}) < count
+
+    _batch(tmp_path / "class", "--config", config, "-p", "1", "-o", tmp_path / "single.jsonl")
+    outputs = []
+    for index in range(count):
+        output = tmp_path / f"shard_{index}.jsonl"
+        _batch(tmp_path / "class", "--config", config, "-p", "1", "-o", output,
+               "--shard", f"{index}/{count}")
+        outputs.append(str(output))
+
+    records, _ = read_records(outputs)
+    manifests, unlisted = read_manifests(outputs)
+    assert not unlisted
+    assert missing_shards({m["shard"] for m in manifests.values()}) == []
+    assert unfinished_students(manifests, records) == []
+    single, _ = read_records([str(tmp_path / "single.jsonl")])
+    assert {s: r["total"] for s, r in records.items()} == {s: r["total"] for s, r in single.items()}
+
+    # Шард без манифеста считается непереданным, даже если в нём есть записи
+    del manifests[outputs[0]]
+    assert missing_shards({m["shard"] for m in manifests.values()}) == [0]
+
+
+def test_resume_regrades_failed_student(tmp_path):
+    config = tmp_path / "tasks.json"
+    config.write_text(json.dumps(CONFIG))
+    _classroom(tmp_path / "class", 2)
+    log = tmp_path / "grades.jsonl"
+    log.write_text(json.dumps({"student": "student0", "path": "x", "total": 0}) + "\n" +
+                   json.dumps({"student": "student1", "path": "x", "error": "упал"}) + "\n")
+    _batch(tmp_path / "class", "--config", config, "-p", "1", "-o", log, "--resume")
+
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [r["student"] for r in lines] == ["student0", "student1", "student1"]
+    records, _ = read_records([str(log)])
+    assert records["student1"]["total"] == 10
+    assert isinstance(records["student1"]["graded_at"], float)
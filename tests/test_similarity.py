@@ -0,0 +1,68 @@
+# tests/test_similarity.py
+import time
+
+from similarity import MIN_PRINTS, SimilarityIndex, update_index
+
+SOURCE = """
+def area(radius):
+    return 3.14159 * radius ** 2
+
+for line in open(0):
+    value = float(line)
+    if value < 0:
+        print("Ошибка")
+    else:
+        print(f"{area(value):.2f}")
+"""
+
+
+def test_empty_submissions_stay_out_of_buckets(tmp_path):
+    students = []
+    for i in range(2000):
+        student = tmp_path / f"student{i:04d}"
+        student.mkdir()
+        (student / "task_02.py").write_text("")
+        students.append(str(student))
+    for i in range(2):
+        student = tmp_path / f"copy{i}"
+        student.mkdir()
+        (student / "task_02.py").write_text(SOURCE)
+        students.append(str(student))
+
+    index = SimilarityIndex()
+    started = time.monotonic()
+    assert update_index(index, students, "task_02.py") == len(students)
+    pairs = index.similar_pairs(0.6)
+    assert time.monotonic() - started < 10
+
+    assert [(first, second) for _, first, second in pairs] == [("copy0", "copy1")]
+    assert len(index.short_entries()) == 2000
+    assert all(name.startswith("copy") for bucket in index.buckets.values() for name in bucket)
+
+
+def test_short_entry_survives_serialization():
+    index = SimilarityIndex()
+    index.add("empty", "d1", set())
+    index.add("tiny", "d2", set(range(MIN_PRINTS - 1)))
+    index.add("full", "d3", set(range(MIN_PRINTS)))
+    restored = SimilarityIndex.from_json(index.to_json())
+    assert restored.short_entries() == ["empty", "tiny"]
+    restored.remove("empty")
+    assert restored.short_entries() == ["tiny"]
+
+
+def test_infinite_literal_and_deep_nesting_do_not_stop_the_run(tmp_path):
+    sources = {
+        "inf0": SOURCE + "big = 1e999\n",
+        "inf1": SOURCE + "big = 1e999\n",
+        # RecursionError при построении AST
+        "deep": "x = " + "1+" * 100000 + "1\n",
+    }
+    for name, source in sources.items():
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "task_02.py").write_text(source)
+
+    index = SimilarityIndex()
+    assert update_index(index, [str(tmp_path / name) for name in sources], "task_02.py") == 3
+    assert [(first, second) for _, first, second in index.similar_pairs(0.6)] == [("inf0", "inf1")]
+    assert "deep" in index.short_entries()
@@ -0,0 +1,28 @@
+# tests/test_tracing.py
+import os
+
+import pytest
+
+import tracing
+from runner import PoolRunner
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="PoolRunner работает через fork()")
+def test_pool_worker_spans_are_merged(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_enabled", True)
+    monkeypatch.setattr(tracing, "_events", [])
+    (tmp_path / "task.py").write_text("print(input() * 2)\n")
+
+    runner = PoolRunner(1)
+    try:
+        result = runner.run("task.py", "ab", timeout=10, cwd=str(tmp_path))
+    finally:
+        runner.close()
+
+    assert result["stdout"].strip() == "abab"
+    events = {event["name"]: event for event in tracing._events}
+    pool_run, collect = events["pool_run"], events["collect"]
+    assert collect["pid"] != os.getpid() == pool_run["pid"]
+    # Интервал процесса пула лежит внутри ожидания родителя
+    assert pool_run["ts"] <= collect["ts"]
+    assert collect["ts"] + collect["dur"] <= pool_run["ts"] + pool_run["dur"]
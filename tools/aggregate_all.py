@@ -1,48 +1,79 @@
 #!/usr/bin/env python3
+import argparse
 import json
 import sys
-import os
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import encode_result_for_classroom, make_task_result_stub
+from utils import encode_result_for_classroom, load_results, resource_totals, slowest_tests
+import tracing
 
-def main():
-    config_path = ".github/tasks.json"
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+def make_aggregated(task, result_data):
+    """Результат задачи для GitHub Classroom: один тест с суммой баллов"""
+    total_score = sum(t.get("score", 0) for t in result_data["tests"])
+    max_score = task["max_score"]
+    return {
+        "version": 1,
+        "status": "pass" if total_score == max_score else "fail",
+        "max_score": max_score,
+        "tests": [{
+            "name": task["name"],
+            "status": "pass" if total_score == max_score else "fail",
+            "score": total_score,
+            "output": f"Набрано баллов: {total_score}/{max_score}"
+        }]
+    }
+
+def aggregate(config, all_results):
+    """Пишет {task_id}_aggregated.txt для GitHub Classroom.
 
+    all_results — результаты всех задач, как из load_results. Возвращает
+    словарь {task_id: закодированный AGGREGATED_RESULT}.
+    """
+    encoded_results = {}
     for task in config["tasks"]:
         task_id = task["id"]
-        json_path = f"results/{task_id}.json"
+        result_data = all_results[task_id]
 
-        if not os.path.exists(json_path):
-            print(f"⚠️ {json_path} missing — creating stub", file=sys.stderr)
-            result_data = make_task_result_stub(task)
-        else:
-            with open(json_path, "r", encoding="utf-8") as f:
-                result_data = json.load(f)
-
-        total_score = sum(t.get("score", 0) for t in result_data["tests"])
+        aggregated = make_aggregated(task, result_data)
+        total_score = aggregated["tests"][0]["score"]
         max_score = task["max_score"]
 
-        aggregated = {
-            "version": 1,
-            "status": "pass" if total_score == max_score else "fail",
-            "max_score": max_score,
-            "tests": [{
-                "name": task["name"],
-                "status": "pass" if total_score == max_score else "fail",
-                "score": total_score,
-                "output": f"Набрано баллов: {total_score}/{max_score}"
-            }]
-        }
-
-        encoded = encode_result_for_classroom(aggregated)
-        with open(f"{task_id}_aggregated.txt", "w") as f:
-            f.write(f"AGGREGATED_RESULT={encoded}\n")
+        with tracing.span("encode", task=task_id):
+            encoded = encode_result_for_classroom(aggregated)
+        with tracing.span("write_aggregated", task=task_id):
+            with open(f"{task_id}_aggregated.txt", "w") as f:
+                f.write(f"AGGREGATED_RESULT={encoded}\n")
+        encoded_results[task_id] = encoded
 
         print(f"📦 Aggregated {task_id}: {total_score}/{max_score}")
 
+        totals = resource_totals(result_data)
+        if totals["measured"]:
+            print(f"   ⏱️ wall {totals['wall_time']:.3f}s, CPU {totals['cpu_time']:.3f}s, "
+                  f"peak RSS {totals['max_rss_kb'] / 1024:.1f} MB")
+
+    slowest = slowest_tests(all_results)
+    if slowest:
+        print("🐢 Самые долгие тесты:")
+        for task_id, test in slowest:
+            print(f"   {task_id} / {test['name']}: {test['wall_time']:.3f}s "
+                  f"(CPU {test['cpu_time']:.3f}s, RSS {test['max_rss_kb'] / 1024:.1f} MB)")
+    return encoded_results
+
+def main():
+    parser = argparse.ArgumentParser()
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+
+    with tracing.session("aggregate_all", args.trace, args.profile):
+        config_path = ".github/tasks.json"
+        with tracing.span("load_config"):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        with tracing.span("load_results"):
+            all_results = load_results(config)
+        aggregate(config, all_results)
+
 if __name__ == "__main__":
     main()
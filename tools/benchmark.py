@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Бенчмарк пропускной способности проверки на синтетическом классе.
+
+Использование:
+    python3 tools/benchmark.py [--students 20] [--mix correct=4,wrong=2,...]
+                               [--output benchmark.json] [--baseline base.json]
+
+Генерирует класс из N сдач: каждая — копия репозитория (tasks.json и
+tools/) с вариантами task_01.py/task_02.py: correct (правильное решение
+с рефакторингом), wrong (неверный вывод), syntax (синтаксическая
+ошибка), loop (бесконечный цикл) и huge (бесконечный вывод). Варианты
+распределяются по сдачам в пропорциях --mix, детерминированно по --seed.
+
+Затем в каждой сдаче, как в CI, запускаются run_all_tests.py и
+code_analysis.py (--processes сдач одновременно) и измеряются:
+пропускная способность (сдач в секунду), задержка на сдачу (p50/p95) и
+пиковый RSS процесса проверки вместе с запущенными им программами.
+
+Результат пишется в JSON. С --baseline он сравнивается с сохранённым
+результатом (прошлым выводом этого скрипта): ухудшение метрики больше
+чем на --threshold считается регрессией, и скрипт завершается с кодом 1.
+Сравнивать имеет смысл только запуски с одинаковыми параметрами на
+одной машине.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from runner import RUNNERS
+from utils import percentile
+
+TOOLS_DIR = Path(__file__).parent
+
+VARIANTS = {
+    "task_01.py": {
+        "correct": "user_id = input()\nprint(user_id * 2)\n",
+        "wrong": "user_id = input()\nprint(user_id)\n",
+        "syntax": "user_id = input(\nprint(user_id * 2)\n",
+        "loop": "while True:\n    pass\n",
+        "huge": "while True:\n    print('x' * 1000)\n",
+    },
+    "task_02.py": {
+        "correct": ("def circle_area(radius):\n"
+                    "    return 3.14 * radius ** 2\n\n\n"
+                    "r1 = float(input())\n"
+                    "r2 = float(input())\n"
+                    "print(f\"{circle_area(r1):.2f}\")\n"
+                    "print(f\"{circle_area(r2):.2f}\")\n"),
+        "wrong": ("r1 = float(input())\n"
+                  "r2 = float(input())\n"
+                  "print(f\"{3.14 * r1 ** 2:.1f}\")\n"
+                  "print(f\"{3.14 * r2 ** 2:.1f}\")\n"),
+        "syntax": "r1 = float(input()\nprint(r1)\n",
+        "loop": "while True:\n    pass\n",
+        "huge": "while True:\n    print('x' * 1000)\n",
+    },
+}
+
+DEFAULT_MIX = "correct=4,wrong=2,syntax=2,loop=1,huge=1"
+
+# Метрика → какое направление лучше
+METRICS = {
+    "throughput": "higher",
+    "latency_p50": "lower",
+    "latency_p95": "lower",
+    "peak_rss_kb": "lower",
+}
+
+
+def parse_mix(text):
+    """'correct=4,wrong=2' → {"correct": 4, "wrong": 2}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in VARIANTS["task_01.py"]:
+            raise ValueError(f"Неизвестный вариант: {name}")
+        mix[name] = int(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Все веса в --mix нулевые")
+    return mix
+
+
+def assign_variants(students, mix, rng):
+    """Варианты для каждой сдачи: [{task_file: variant}].
+
+    Для каждого файла задачи набор вариантов равномерно выбирается из
+    пропорций mix и перемешивается отдельно, поэтому доли близки к
+    заданным даже для малого класса, а сочетания — случайные.
+    """
+    pool = [name for name, weight in mix.items() for _ in range(weight)]
+    columns = {}
+    for task_file in VARIANTS:
+        column = [pool[i * len(pool) // students] for i in range(students)]
+        rng.shuffle(column)
+        columns[task_file] = column
+    return [{task_file: columns[task_file][i] for task_file in VARIANTS}
+            for i in range(students)]
+
+
+def benchmark_config(config, timeout=None, cases=None):
+    """Копия tasks.json с переопределёнными таймаутами и числом вводов"""
+    config = copy.deepcopy(config)
+    for task in config["tasks"]:
+        for test in task.get("tests", []):
+            if timeout is not None:
+                test["timeout"] = timeout
+            if cases is not None and "count" in test:
+                test["count"] = cases
+        for rule in task.get("rules", []):
+            if timeout is not None and rule["rule"] == "output":
+                rule["timeout"] = timeout
+    return config
+
+
+def generate_classroom(root, config, students, mix, seed=0):
+    """Создаёт сдачи в root и возвращает список их каталогов"""
+    rng = random.Random(seed)
+    submissions = []
+    manifest = {}
+    ignore = shutil.ignore_patterns("__pycache__", "*.pyc")
+    for i, variants in enumerate(assign_variants(students, mix, rng), 1):
+        name = f"student_{i:04d}"
+        path = os.path.join(root, name)
+        os.makedirs(os.path.join(path, ".github"))
+        with open(os.path.join(path, ".github", "tasks.json"), "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+        shutil.copytree(TOOLS_DIR, os.path.join(path, "tools"), ignore=ignore)
+        for task_file, variant in variants.items():
+            with open(os.path.join(path, task_file), "w", encoding="utf-8") as f:
+                f.write(VARIANTS[task_file][variant])
+        submissions.append(path)
+        manifest[name] = variants
+    with open(os.path.join(root, "classroom.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return submissions
+
+
+def measure(command, cwd):
+    """Запускает команду и возвращает время и пиковый RSS (с потомками)"""
+    started = time.monotonic()
+    proc = subprocess.Popen(command, cwd=cwd, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # wait4 даёт ru_maxrss именно этого процесса и дождавшихся им потомков
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        "wall_time": time.monotonic() - started,
+        "max_rss_kb": usage.ru_maxrss,
+        "returncode": proc.returncode
+    }
+
+
+def bench_script(command, submissions, processes):
+    """Прогоняет команду во всех сдачах и сводит метрики"""
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=processes) as executor:
+        runs = list(executor.map(lambda path: measure(command, path), submissions))
+    total = time.monotonic() - started
+    latencies = [run["wall_time"] for run in runs]
+    return {
+        "submissions": len(runs),
+        "total_time": round(total, 3),
+        "throughput": round(len(runs) / total, 3) if total else None,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_max": round(max(latencies), 3) if latencies else None,
+        "peak_rss_kb": max((run["max_rss_kb"] for run in runs), default=0),
+        "failed_runs": sum(1 for run in runs if run["returncode"] != 0)
+    }
+
+
+def compare(current, baseline, threshold):
+    """Сравнение с базой: [{script, metric, baseline, current, change, regression}]"""
+    rows = []
+    for script, metrics in current["scripts"].items():
+        base_metrics = baseline.get("scripts", {}).get(script)
+        if base_metrics is None:
+            continue
+        for metric, better in METRICS.items():
+            base, value = base_metrics.get(metric), metrics.get(metric)
+            if not base or value is None:
+                continue
+            change = (value - base) / base
+            worse = change > threshold if better == "lower" else change < -threshold
+            rows.append({"script": script, "metric": metric, "baseline": base,
+                         "current": value, "change": round(change, 4), "regression": worse})
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"## 📈 Сравнение с базой (порог {threshold:.0%})\n")
+    print("| Скрипт | Метрика | База | Сейчас | Изменение | |")
+    print("|--------|---------|------|--------|-----------|---|")
+    for row in rows:
+        status = "❌ регрессия" if row["regression"] else "✅"
+        print(f"| {row['script']} | {row['metric']} | {row['baseline']} | "
+              f"{row['current']} | {row['change']:+.1%} | {status} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк проверки на синтетическом классе")
+    parser.add_argument("--config", default=".github/tasks.json")
+    parser.add_argument("--students", "-n", type=int, default=20)
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="Доли вариантов сдач: correct, wrong, syntax, loop, huge")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", "-p", type=int, default=os.cpu_count() or 1,
+                        help="Число одновременно проверяемых сдач")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="--jobs для run_all_tests.py")
+    parser.add_argument("--runner", choices=RUNNERS, default="subprocess")
+    parser.add_argument("--timeout", type=float, default=1.0,
+                        help="Таймаут программы в тестах синтетического класса, с")
+    parser.add_argument("--cases", type=int, default=None,
+                        help="Число вводов в дифференциальных тестах (по умолчанию — из tasks.json)")
+    parser.add_argument("--full", action="store_true",
+                        help="Запускать code_analysis.py с внешними линтерами")
+    parser.add_argument("--classroom", metavar="DIR",
+                        help="Создать класс в DIR и не удалять его (по умолчанию — во временном каталоге)")
+    parser.add_argument("--output", "-o", default="benchmark.json")
+    parser.add_argument("--baseline", metavar="JSON",
+                        help="Сравнить с сохранённым результатом")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Допустимое ухудшение метрики (доля), выше — регрессия")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = benchmark_config(json.load(f), args.timeout, args.cases)
+
+    root = args.classroom or tempfile.mkdtemp(prefix="grader_bench_")
+    try:
+        os.makedirs(root, exist_ok=True)
+        submissions = generate_classroom(root, config, args.students, mix, args.seed)
+        print(f"🏫 Синтетический класс: {len(submissions)} сдач в {root}", file=sys.stderr)
+
+        commands = {
+            "run_all_tests": [sys.executable, "tools/run_all_tests.py", "--no-cache",
+                              "--runner", args.runner, "--jobs", str(args.jobs)],
+            "code_analysis": [sys.executable, "tools/code_analysis.py", "--no-cache"] +
+                             (["--full"] if args.full else []),
+        }
+        scripts = {}
+        for name, command in commands.items():
+            print(f"⏱️ {name}...", file=sys.stderr)
+            scripts[name] = bench_script(command, submissions, max(1, args.processes))
+            stats = scripts[name]
+            print(f"   {stats['throughput']} сдач/с, p50 {stats['latency_p50']} с, "
+                  f"p95 {stats['latency_p95']} с, RSS {stats['peak_rss_kb'] / 1024:.1f} MB",
+                  file=sys.stderr)
+    finally:
+        if not args.classroom:
+            shutil.rmtree(root, ignore_errors=True)
+
+    result = {
+        "params": {
+            "students": args.students, "mix": mix, "seed": args.seed,
+            "processes": args.processes, "jobs": args.jobs, "runner": args.runner,
+            "timeout": args.timeout, "cases": args.cases, "full": args.full
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "scripts": scripts
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 Результат: {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params") != result["params"]:
+            print("⚠️ Параметры базы отличаются — сравнение может быть некорректным",
+                  file=sys.stderr)
+        rows = compare(result, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
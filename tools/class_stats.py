@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Статистика по всему классу в формате отчёта GITHUB_STEP_SUMMARY.
+
+Использование:
+    python3 tools/class_stats.py grades.jsonl
+    python3 tools/class_stats.py students/*/results
+
+Источник — JSONL из grade_batch.py (одна сдача на строку) или каталог
+results/ одной сдачи. Сдачи обрабатываются потоково, и память (кроме
+номера строки на студента) зависит от числа задач и тестов: баллы
+копятся в гистограмме (баллы — небольшие целые числа, поэтому медиана по
+ней точная), а частые ошибки — в счётчике space-saving ограниченного
+размера.
+
+Если студент встречается в JSONL несколько раз (журнал --resume, где за
+ошибкой проверки следует повторная попытка, или несколько журналов),
+учитывается только его последняя запись, как в merge_shards.py. Для
+этого JSONL читаются дважды: в первый проход запоминается лишь номер
+последней строки каждого студента.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from report_summary import write_summary
+from utils import load_results
+
+# Сколько разных сообщений об ошибке отслеживается на тест
+FAILURE_CAPACITY = 32
+# Сколько самых частых ошибок попадает в отчёт
+TOP_FAILURES = 3
+
+
+class SpaceSaving:
+    """Приближённый top-k (алгоритм space-saving) с памятью O(capacity).
+
+    Счётчик элемента может быть завышен не больше, чем на его error.
+    """
+
+    def __init__(self, capacity=FAILURE_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, item):
+        if item in self.counts:
+            self.counts[item] += 1
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+        else:
+            # Вытесняем самый редкий элемент, новый наследует его счётчик
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[item] = floor + 1
+            self.errors[item] = floor
+
+    def top(self, n):
+        """[(элемент, счётчик, погрешность)] по убыванию счётчика"""
+        items = sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+        return [(item, count, self.errors[item]) for item, count in items]
+
+
+class ScoreStats:
+    """Среднее, медиана и гистограмма целочисленных баллов"""
+
+    def __init__(self):
+        self.histogram = Counter()
+        self.count = 0
+        self.total = 0
+        self.passed = 0
+
+    def add(self, score, passed):
+        self.histogram[score] += 1
+        self.count += 1
+        self.total += score
+        self.passed += passed
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def median(self):
+        if not self.count:
+            return 0
+        middle = {(self.count - 1) // 2, self.count // 2}
+        values = []
+        rank = 0
+        for score in sorted(self.histogram):
+            end = rank + self.histogram[score]
+            values += [score for i in middle if rank <= i < end]
+            rank = end
+        return sum(values) / len(values)
+
+    def pass_rate(self):
+        return 100 * self.passed // self.count if self.count else 0
+
+
+def failure_text(output):
+    """Ключ ошибки для подсчёта: первая строка вывода, не длиннее 80 символов"""
+    line = (output or "").strip().split("\n", 1)[0]
+    return line[:80] or "(пустой вывод)"
+
+
+class ClassStats:
+    def __init__(self, config):
+        self.config = config
+        self.submissions = 0
+        self.errors = 0
+        self.tasks = {task["id"]: ScoreStats() for task in config["tasks"]}
+        self.tests = {}
+        self.failures = {}
+
+    def add_error(self):
+        """Сдача, проверка которой упала (запись grade_batch с полем error)"""
+        self.errors += 1
+
+    def add_submission(self, results):
+        """Учитывает одну сдачу {task_id: results/{task_id}.json}"""
+        self.submissions += 1
+        for task in self.config["tasks"]:
+            task_id = task["id"]
+            data = results.get(task_id, {"tests": []})
+            score = sum(t.get("score", 0) for t in data["tests"])
+            self.tasks[task_id].add(score, score == task["max_score"])
+            for test in data["tests"]:
+                key = (task_id, test["name"])
+                if key not in self.tests:
+                    self.tests[key] = ScoreStats()
+                    self.failures[key] = SpaceSaving()
+                passed = test.get("status") == "pass"
+                self.tests[key].add(test.get("score", 0), passed)
+                if not passed:
+                    self.failures[key].add(failure_text(test.get("output")))
+
+    def render(self):
+        summary = []
+        summary.append("## 👥 СТАТИСТИКА ПО КЛАССУ\n")
+        line = f"Сдач: **{self.submissions}**"
+        if self.errors:
+            line += f", проверка упала: **{self.errors}**"
+        summary.append(line + "\n")
+
+        summary.append("### 📈 Задания\n")
+        summary.append("| Задание | Среднее | Медиана | Максимум | Сдали полностью |")
+        summary.append("|---------|---------|---------|----------|-----------------|")
+        for task in self.config["tasks"]:
+            stats = self.tasks[task["id"]]
+            summary.append(f"| **{task['name']}** | {stats.mean():.1f} | {stats.median():g} | "
+                           f"{task['max_score']} | {stats.pass_rate()}% |")
+        summary.append("")
+
+        summary.append("### 📊 Распределение баллов\n")
+        for task in self.config["tasks"]:
+            stats = self.tasks[task["id"]]
+            if not stats.count:
+                continue
+            summary.append(f"**{task['id']}**\n")
+            summary.append("| Баллы | Сдач | |")
+            summary.append("|-------|------|-|")
+            peak = max(stats.histogram.values())
+            for score in sorted(stats.histogram):
+                count = stats.histogram[score]
+                bar = "█" * max(1, round(20 * count / peak))
+                summary.append(f"| {score} | {count} | {bar} |")
+            summary.append("")
+
+        summary.append("### 🧪 Тесты\n")
+        summary.append("| Задание | Тест | Среднее | Медиана | Прошли |")
+        summary.append("|---------|------|---------|---------|--------|")
+        for (task_id, name), stats in self.tests.items():
+            summary.append(f"| {task_id} | {name} | {stats.mean():.1f} | {stats.median():g} | "
+                           f"{stats.pass_rate()}% |")
+        summary.append("")
+
+        frequent = [(key, counter.top(TOP_FAILURES)) for key, counter in self.failures.items()]
+        frequent = [(key, top) for key, top in frequent if top]
+        if frequent:
+            summary.append("### ❌ Частые ошибки\n")
+            for (task_id, name), top in frequent:
+                summary.append(f"**{task_id} / {name}**")
+                for text, count, error in top:
+                    approx = f" (±{error})" if error else ""
+                    text = text.replace("`", "'")
+                    summary.append(f"- `{text}` — {count}{approx}")
+                summary.append("")
+        return "\n".join(summary) + "\n"
+
+
+def _jsonl_records(path):
+    """(номер строки, запись) JSONL; недописанные строки пропускаются"""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                # Недописанная строка прерванного запуска
+                print(f"⚠️ {path}:{number}: повреждённая запись пропущена", file=sys.stderr)
+
+
+def iter_submissions(sources, config):
+    """Выдаёт результаты сдач по одной: словарь {task_id: ...} или None для упавших.
+
+    Из JSONL берётся только последняя запись каждого студента.
+    """
+    last = {}
+    for index, source in enumerate(sources):
+        if not os.path.isdir(source):
+            for number, record in _jsonl_records(source):
+                last[record["student"]] = (index, number)
+    for index, source in enumerate(sources):
+        if os.path.isdir(source):
+            yield load_results(config, results_dir=source)
+            continue
+        for number, record in _jsonl_records(source):
+            if last.get(record["student"]) == (index, number):
+                yield None if "error" in record else record["results"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Статистика по классу")
+    parser.add_argument("sources", nargs="+",
+                        help="JSONL из grade_batch.py и/или каталоги results/ сдач")
+    parser.add_argument("--config", default=".github/tasks.json")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    stats = ClassStats(config)
+    for results in iter_submissions(args.sources, config):
+        if results is None:
+            stats.add_error()
+        else:
+            stats.add_submission(results)
+    write_summary(stats.render())
+
+if __name__ == "__main__":
+    main()
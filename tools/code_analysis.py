@@ -1,114 +1,230 @@
 #!/usr/bin/env python3
-import subprocess
+import argparse
+import ast
+import json
 import os
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-def analyze_task_file(filename):
-    """Анализирует файл задачи"""
-    if not os.path.exists(filename):
-        return None
-    
-    results = {
+sys.path.insert(0, str(Path(__file__).parent))
+import fast_lint
+import tracing
+from result_cache import DEFAULT_CACHE_DIR, ResultCache, file_digest
+
+# Подписи колонок: внешние линтеры (--full) и встроенный быстрый линтер
+LABELS = {
+    'full': {'title': 'PyLint, Flake8, Ruff', 'score': 'PyLint', 'style': 'Flake8', 'flakes': 'Ruff'},
+    'fast': {'title': 'встроенный быстрый линтер (полный анализ — --full)',
+             'score': 'Оценка', 'style': 'Стиль', 'flakes': 'Pyflakes'},
+}
+
+def count_statements(filename):
+    """Число операторов в файле — знаменатель формулы оценки pylint"""
+    try:
+        with open(filename, "rb") as f:
+            tree = ast.parse(f.read(), filename)
+    except (SyntaxError, ValueError):
+        return 0
+    return fast_lint.count_statements(tree)
+
+
+def run_pylint(filenames):
+    """Один запуск pylint на все файлы, JSON-вывод разбирается по файлам"""
+    result = subprocess.run(
+        ['pylint', *filenames, '--exit-zero', '--output-format=json'],
+        capture_output=True, text=True, timeout=60
+    )
+    messages = json.loads(result.stdout or "[]")
+    per_file = {}
+    for filename in filenames:
+        own = [m for m in messages if os.path.normpath(m["path"]) == os.path.normpath(filename)]
+        per_file[filename] = {
+            'pylint_score': round(fast_lint.pylint_score(own, count_statements(filename)), 2)
+        }
+    return per_file
+
+
+# У flake8 нет встроенного JSON-формата, поэтому используется формат
+# с табуляциями — его разбор однозначен в отличие от текста по умолчанию
+FLAKE8_FORMAT = "%(path)s\t%(row)d\t%(col)d\t%(code)s\t%(text)s"
+
+
+def run_flake8(filenames):
+    result = subprocess.run(
+        ['flake8', f'--format={FLAKE8_FORMAT}', *filenames],
+        capture_output=True, text=True, timeout=60
+    )
+    lines = {filename: [] for filename in filenames}
+    for line in result.stdout.splitlines():
+        parts = line.split("\t", 4)
+        if len(parts) != 5:
+            continue
+        path, row, col, code, text = parts
+        for filename in filenames:
+            if os.path.normpath(path) == os.path.normpath(filename):
+                lines[filename].append(f"{path}:{row}:{col}: {code} {text}")
+    return {
+        filename: {
+            'flake8_output': "".join(line + "\n" for line in found),
+            'flake8_errors': len(found)
+        }
+        for filename, found in lines.items()
+    }
+
+
+def run_ruff(filenames):
+    result = subprocess.run(
+        ['ruff', 'check', *filenames, '--exit-zero', '--output-format', 'json'],
+        capture_output=True, text=True, timeout=60
+    )
+    messages = json.loads(result.stdout or "[]")
+    per_file = {}
+    for filename in filenames:
+        target = os.path.abspath(filename)
+        details = [
+            f"{filename}:{m['location']['row']}:{m['location']['column']}: {m['code']} {m['message']}"
+            for m in messages if os.path.abspath(m["filename"]) == target
+        ]
+        per_file[filename] = {
+            'ruff_output': "\n".join(details) if details else "All checks passed!",
+            'ruff_errors': len(details),
+            'ruff_details': details[:10]
+        }
+    return per_file
+
+
+LINTERS = {
+    'pylint': run_pylint,
+    'flake8': run_flake8,
+    'ruff': run_ruff,
+}
+
+
+def run_linter(name, filenames, cache):
+    """Запускает линтер один раз на все файлы, которых нет в кэше"""
+    found = {}
+    keys = {}
+    for filename in filenames:
+        if cache is not None:
+            keys[filename] = ResultCache.make_key("lint", name, filename, file_digest(filename))
+            cached = cache.get(keys[filename])
+            if cached is not None:
+                found[filename] = cached
+    todo = [f for f in filenames if f not in found]
+    if not todo:
+        return found
+
+    try:
+        with tracing.span(f"lint:{name}", files=len(todo)):
+            fresh = LINTERS[name](todo)
+    except Exception as e:
+        # Линтер не установлен или упал — остаются значения по умолчанию
+        print(f"ERROR running {name}: {e}", file=sys.stderr)
+        return found
+
+    for filename, values in fresh.items():
+        if cache is not None:
+            cache.put(keys[filename], values)
+        found[filename] = values
+    return found
+
+
+def empty_result(filename):
+    return {
         'file': filename,
         'exists': True,
         'pylint_score': 0,
         'flake8_errors': 0,
         'ruff_errors': 0,
+        'flake8_output': '',
+        'ruff_output': '',
+        'ruff_details': [],
         'syntax_ok': False
     }
-    
-    # Проверка синтаксиса
-    try:
-        subprocess.run(['python3', '-m', 'py_compile', filename], 
-                      capture_output=True, check=True)
-        results['syntax_ok'] = True
-    except subprocess.CalledProcessError:
-        results['syntax_ok'] = False
-    
-    # PyLint
-    try:
-        pylint_result = subprocess.run(
-            ['pylint', filename, '--exit-zero', '--score=yes'],
-            capture_output=True, text=True, timeout=10
-        )
-        for line in pylint_result.stdout.split('\n'):
-            if 'rated at' in line:
-                score = line.split('rated at ')[1].split('/')[0]
-                results['pylint_score'] = float(score)
-                break
-    except:
-        pass
-    
-    # Flake8
-    try:
-        flake8_result = subprocess.run(
-            ['flake8', filename],
-            capture_output=True, text=True
-        )
-        results['flake8_output'] = flake8_result.stdout
-        results['flake8_errors'] = len(flake8_result.stdout.strip().split('\n')) if flake8_result.stdout.strip() else 0
-    except:
-        pass
-    
-    # Ruff - используем --exit-zero чтобы не падать на ошибках
-    try:
-        ruff_result = subprocess.run(
-            ['ruff', 'check', filename, '--exit-zero', '--output-format', 'text'],
-            capture_output=True, text=True
-        )
-        results['ruff_output'] = ruff_result.stdout + ruff_result.stderr
-        
-        # Парсим вывод правильно
-        lines = ruff_result.stdout.split('\n')
-        error_count = 0
-        
-        # Считаем строки с ошибками (формат: filename:line:col: code message)
-        for line in lines:
-            if filename in line and ':' in line:
-                parts = line.split(':')
-                if len(parts) >= 4:
-                    error_count += 1
-        
-        results['ruff_errors'] = error_count
-        results['ruff_details'] = [l for l in lines if filename in l][:10]
-        
-    except Exception as e:
-        print(f"ERROR running ruff for {filename}: {e}", file=sys.stderr)
-        results['ruff_output'] = f"Error: {e}"
-        results['ruff_errors'] = 0
-    
-    # try:
-    #     ruff_result = subprocess.run(
-    #         ['ruff', 'check', filename, '--exit-zero'],
-    #         capture_output=True, text=True
-    #     )
-    #     results['ruff_output'] = ruff_result.stdout
-        
-    #     # Считаем строки с ошибками
-    #     lines = [l for l in ruff_result.stdout.split('\n') if l.strip() and ':' in l and filename in l]
-    #     results['ruff_errors'] = len(lines)
-    #     results['ruff_details'] = lines[:10]
-        
-    # except:
-    #     pass
-    
-    return results
 
-def analysis():
+
+def analyze_task_files_fast(filenames):
+    """Анализ встроенным линтером fast_lint, без внешних процессов.
+
+    Колонки те же, что у полного анализа: оценка 0–10, число нарушений
+    стиля (E/W/C) и число ошибок pyflakes (F и синтаксис).
+    """
+    analysis_results = {}
+    for filename in filenames:
+        if not os.path.exists(filename):
+            analysis_results[filename] = None
+            continue
+        results = empty_result(filename)
+        with tracing.span("lint:fast", file=filename):
+            lint = fast_lint.lint_file(filename)
+        messages = lint['messages']
+        style = [fast_lint.format_message(filename, m) for m in messages
+                 if m['code'][0] in "EWC" and m['type'] != 'fatal']
+        flakes = [fast_lint.format_message(filename, m) for m in messages
+                  if m['code'][0] == "F" or m['type'] == 'fatal']
+        results.update({
+            'syntax_ok': not any(m['type'] == 'fatal' for m in messages),
+            'pylint_score': lint['score'],
+            'flake8_output': "".join(line + "\n" for line in style),
+            'flake8_errors': len(style),
+            'ruff_errors': len(flakes),
+            'ruff_details': flakes[:10]
+        })
+        analysis_results[filename] = results
+    return analysis_results
+
+
+def analyze_task_files(filenames, cache=None):
+    """Анализирует все файлы задач за один проход.
+
+    Каждый линтер запускается один раз на все файлы, линтеры работают
+    параллельно. Возвращает {filename: результаты или None, если файла нет}.
+    """
+    existing = [f for f in filenames if os.path.exists(f)]
+    analysis_results = {f: None for f in filenames}
+
+    for filename in existing:
+        results = empty_result(filename)
+        # Проверка синтаксиса (то же, что py_compile, без отдельного процесса)
+        try:
+            with open(filename, "rb") as f:
+                compile(f.read(), filename, "exec")
+            results['syntax_ok'] = True
+        except (SyntaxError, ValueError):
+            results['syntax_ok'] = False
+        analysis_results[filename] = results
+
+    if existing:
+        with ThreadPoolExecutor(max_workers=len(LINTERS)) as executor:
+            futures = [executor.submit(run_linter, name, existing, cache) for name in LINTERS]
+            for future in futures:
+                for filename, values in future.result().items():
+                    analysis_results[filename].update(values)
+
+    return analysis_results
+
+def analysis(cache=None, full=False):
     task_files = ['task_01.py', 'task_02.py', 'task_03.py']
+    if full:
+        analysis_results = analyze_task_files(task_files, cache)
+    else:
+        analysis_results = analyze_task_files_fast(task_files)
+    labels = LABELS['full' if full else 'fast']
     
     print("## 🔍 ДЕТАЛЬНЫЙ АНАЛИЗ КАЧЕСТВА КОДА")
-    print("### Используются линтеры: PyLint, Flake8, Ruff")
+    print(f"### Используются линтеры: {labels['title']}")
     print("")
     
     # Сводная таблица
     print("### 📊 Сводная таблица по задачам")
     print("")
-    print("| Задача | Файл | Синтаксис | PyLint | Flake8 | Ruff | Статус |")
+    print(f"| Задача | Файл | Синтаксис | {labels['score']} | {labels['style']} | {labels['flakes']} | Статус |")
     print("|--------|------|-----------|--------|--------|------|--------|")
     
     for i, task_file in enumerate(task_files, 1):
-        result = analyze_task_file(task_file)
+        result = analysis_results[task_file]
         
         if result is None:
             print(f"| Задача {i} | `{task_file}` | ❌ | - | - | - | ❌ Не сдано |")
@@ -136,7 +252,7 @@ def analysis():
     
     # Детальный анализ
     for i, task_file in enumerate(task_files, 1):
-        result = analyze_task_file(task_file)
+        result = analysis_results[task_file]
         if result is None:
             print(f"### ⚠️ Задача {i}: Файл `{task_file}` не найден")
             print("Студент еще не сдал эту задачу.")
@@ -152,26 +268,26 @@ def analysis():
             print("**❌ Синтаксис:** Ошибка в коде")
             print("")
         
-        print(f"**🐍 PyLint:** {result['pylint_score']:.1f}/10")
+        print(f"**🐍 {labels['score']}:** {result['pylint_score']:.1f}/10")
         print("")
         
         if result['flake8_errors'] > 0:
-            print(f"**❌ Flake8 ошибки ({result['flake8_errors']}):**")
+            print(f"**❌ {labels['style']} ошибки ({result['flake8_errors']}):**")
             print("```")
             print(result['flake8_output'])
             print("```")
         else:
-            print("**✅ Flake8:** Нет ошибок")
+            print(f"**✅ {labels['style']}:** Нет ошибок")
         print("")
         
         if result['ruff_errors'] > 0:
-            print(f"**❌ Ruff ошибки ({result['ruff_errors']}):**")
+            print(f"**❌ {labels['flakes']} ошибки ({result['ruff_errors']}):**")
             print("```")
             for error in result['ruff_details']:
                 print(error)
             print("```")
         else:
-            print("**✅ Ruff:** Нет ошибок")
+            print(f"**✅ {labels['flakes']}:** Нет ошибок")
             if result['ruff_output'] and "All checks passed" in result['ruff_output']:
                 print("```")
                 print("All checks passed!")
@@ -193,5 +309,22 @@ def analysis():
         print("*Качество кода учитывается при оценке!*")
 
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true",
+                        help="Запустить внешние линтеры PyLint, Flake8 и Ruff")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Не использовать кэш результатов линтеров")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+
+    cache = None
+    if args.full and not args.no_cache:
+        cache = ResultCache(args.cache_dir, namespace="lint")
+    with tracing.session("code_analysis", args.trace, args.profile):
+        analysis(cache, full=args.full)
+
+
 if __name__ == "__main__":
-    analysis()
+    main()
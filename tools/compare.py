@@ -0,0 +1,189 @@
+# tools/compare.py
+"""Сравнение вывода программы с ожидаемым.
+
+comparison_method "exact" — потоковое сравнение. Результат совпадает с
+прежним `stdout.strip() == expected_output`, но вывод проверяется по мере
+поступления: при первом расхождении программу можно остановить, не
+дожидаясь завершения. Позиция расхождения — (строка, столбец) в выводе
+программы, оба с 1.
+
+comparison_method "numeric" — числа сравниваются с допуском abs_tol /
+rel_tol (|получено − ожидалось| ≤ abs_tol + rel_tol·|ожидалось|), текст
+вне чисел — отдельно, без учёта количества и вида пробельных символов.
+Вывод разбивается на числа и текст одним проходом регулярного выражения
+(а вывод только из чисел и пробельных символов — str.split), числа
+разбираются и сравниваются пакетом: через NumPy, если он установлен,
+иначе цепочкой map по функциям operator — без цикла Python по отдельным
+числам.
+"""
+import codecs
+import io
+import locale
+import operator
+import re
+from itertools import islice, repeat
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_ABS_TOL = 1e-9
+DEFAULT_REL_TOL = 1e-9
+
+# Группа в шаблоне: re.split возвращает текст и числа вперемежку
+NUMBER_RE = re.compile(r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)", re.ASCII)
+# Удаляет символы чисел и пробельные: пустой результат — вывод из одних чисел
+_NUMERIC_ONLY = str.maketrans("", "", "0123456789+-.eE \t\n\r\f\v")
+
+
+class StreamComparator:
+    """Сравнивает поступающий вывод с expected с учётом .strip()"""
+
+    def __init__(self, expected, encoding=None):
+        self.expected = expected
+        self.pos = 0            # сколько символов expected уже совпало
+        self.started = False    # пропущены ли ведущие пробельные символы
+        self.line = 1
+        self.column = 1
+        self.mismatch = None
+        decoder = codecs.getincrementaldecoder(encoding or locale.getpreferredencoding(False))
+        # Универсальные переводы строк — как у _decode в runner
+        self._decoder = io.IncrementalNewlineDecoder(decoder(errors="replace"), translate=True)
+
+    def _advance(self, text):
+        newlines = text.count("\n")
+        if newlines:
+            self.line += newlines
+            self.column = len(text) - text.rfind("\n")
+        else:
+            self.column += len(text)
+
+    def _fail(self, consumed):
+        self._advance(consumed)
+        self.mismatch = (self.line, self.column)
+        return False
+
+    def feed_bytes(self, data):
+        return self.feed(self._decoder.decode(data))
+
+    def feed(self, text):
+        """Принимает очередной кусок вывода. False — расхождение уже найдено"""
+        if self.mismatch is not None:
+            return False
+        i = 0
+        if not self.started:
+            i = len(text) - len(text.lstrip())
+            self._advance(text[:i])
+            if i == len(text):
+                return True
+            self.started = True
+
+        n = min(len(text) - i, len(self.expected) - self.pos)
+        segment = text[i:i + n]
+        if segment != self.expected[self.pos:self.pos + n]:
+            k = next(k for k, (a, b) in enumerate(zip(segment, self.expected[self.pos:])) if a != b)
+            return self._fail(segment[:k])
+        self._advance(segment)
+        self.pos += n
+
+        # После ожидаемого вывода допустимы только пробельные символы
+        rest = text[i + n:]
+        if rest and not rest.isspace():
+            return self._fail(rest[:len(rest) - len(rest.lstrip())])
+        self._advance(rest)
+        return True
+
+    def finish(self):
+        """Завершает сравнение по концу вывода. Возвращает позицию расхождения или None"""
+        self.feed(self._decoder.decode(b"", final=True))
+        if self.mismatch is None and (self.pos < len(self.expected) or
+                                      self.expected[-1:].isspace()):
+            self.mismatch = (self.line, self.column)
+        return self.mismatch
+
+
+def find_mismatch(expected, output):
+    """Позиция первого расхождения готового вывода с expected или None"""
+    comparator = StreamComparator(expected)
+    comparator.feed(output)
+    return comparator.finish()
+
+
+def _parse(numbers):
+    if np is not None:
+        return np.array(numbers, dtype=np.float64)
+    return list(map(float, numbers))
+
+
+def _split(text):
+    """(строки чисел, их значения или None, слова текста вне чисел)
+
+    В словах на месте каждого числа стоит \0, чтобы «a1b» и «a 1 b»
+    различались.
+    """
+    if not text.translate(_NUMERIC_ONLY):
+        tokens = text.split()
+        try:
+            # Токен из этих символов, который разбирает float, — ровно
+            # одно число NUMBER_RE
+            return tokens, _parse(tokens), ["\0"] * len(tokens)
+        except ValueError:
+            pass
+    parts = NUMBER_RE.split(text)
+    return parts[1::2], None, "\0".join(parts[::2]).split()
+
+
+def _first_outside(a, e, abs_tol, rel_tol):
+    """Индекс первого числа вне допуска или None"""
+    if np is not None:
+        with np.errstate(invalid="ignore"):
+            # a == e — для совпадающих бесконечностей
+            close = (np.abs(a - e) <= abs_tol + rel_tol * np.abs(e)) | (a == e)
+        outside = np.flatnonzero(~close)
+        return int(outside[0]) if outside.size else None
+    if a == e:
+        return None
+    if rel_tol:
+        limits = map(operator.add, repeat(abs_tol),
+                     map(operator.mul, repeat(rel_tol), map(abs, e)))
+    else:
+        limits = repeat(abs_tol)
+    close = list(map(operator.le, map(abs, map(operator.sub, a, e)), limits))
+    k = -1
+    while True:
+        try:
+            k = close.index(False, k + 1)
+        except ValueError:
+            return None
+        # Совпадающие бесконечности: inf - inf = nan
+        if a[k] != e[k]:
+            return k
+
+
+def numeric_mismatch(expected, output, abs_tol=DEFAULT_ABS_TOL, rel_tol=DEFAULT_REL_TOL):
+    """Сравнение по comparison_method "numeric".
+
+    Возвращает None, если вывод совпал, иначе (описание, позиция), где
+    позиция — (строка, столбец) неверного числа или None.
+    """
+    expected_numbers, expected_values, expected_words = _split(expected)
+    output_numbers, output_values, output_words = _split(output)
+    if len(expected_numbers) != len(output_numbers):
+        return (f"Чисел в выводе {len(output_numbers)}, ожидалось {len(expected_numbers)}",
+                None)
+    if expected_words != output_words:
+        return "Текст вне чисел отличается от ожидаемого", None
+    if expected_values is None:
+        expected_values = _parse(expected_numbers)
+    if output_values is None:
+        output_values = _parse(output_numbers)
+    k = _first_outside(output_values, expected_values, abs_tol, rel_tol)
+    if k is None:
+        return None
+    # Позиция нужна только при расхождении
+    pos = next(islice(NUMBER_RE.finditer(output), k, None)).start()
+    line = output.count("\n", 0, pos) + 1
+    column = pos - output.rfind("\n", 0, pos)
+    return (f"Число {k + 1}: ожидалось {expected_numbers[k]}, получено {output_numbers[k]}",
+            (line, column))
@@ -0,0 +1,155 @@
+# tools/differential.py
+"""Дифференциальные тесты (comparison_method: "differential").
+
+Пример теста в tasks.json:
+
+    {
+      "name": "Случайные радиусы",
+      "comparison_method": "differential",
+      "generator": "reference_tasks:task_02_inputs",
+      "reference": "reference_tasks:task_02_reference",
+      "count": 200,
+      "seed": 2,
+      "case_comparison": "numeric",
+      "abs_tol": 0.01,
+      "max_score": 10
+    }
+
+generator(count, rng) возвращает список вводов (строки stdin), а
+reference(inputs) — список ожидаемых выводов для всего пакета сразу, что
+позволяет эталону считать их одним векторизованным вычислением. Программа
+студента запускается на каждом вводе через тот же runner, что и обычные
+тесты (с бэкендом pool это дешевле всего). Вывод на каждом вводе
+сравнивается как у "exact" или, при "case_comparison": "numeric", как у
+"numeric" с допусками abs_tol/rel_tol теста. Тест проходит, если совпали все вводы; в отчёт попадает
+наименьший ввод, на котором программа ошиблась.
+
+С "max_score": 0 тест только информирует: расхождения видны в отчёте,
+но на баллы задачи не влияют. Так он и добавлен в задачи курса, чтобы не
+менять опубликованные веса.
+
+Одновременно выполняется не больше jobs вводов — столько же, сколько
+потоков у общего пула проверки (--jobs). После первого TIMEOUT или
+OUTPUT_LIMIT новые вводы не запускаются: зациклившаяся программа стоит
+не больше jobs таймаутов, а не count.
+"""
+import importlib
+import random
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from compare import DEFAULT_ABS_TOL, DEFAULT_REL_TOL, find_mismatch, numeric_mismatch
+
+
+def load_function(spec):
+    """Функция по строке "module:function" (модуль ищется в каталоге tools)"""
+    module_name, _, function = spec.partition(":")
+    return getattr(importlib.import_module(module_name), function)
+
+
+def _check_case(runner, task_file, stdin, expected, timeout, root, tolerance=None):
+    """(вывод или None при совпадении, результат запуска).
+
+    tolerance — (abs_tol, rel_tol) для численного сравнения; без него
+    вывод сравнивается точно, прямо во время работы программы.
+    """
+    expect = expected if tolerance is None else None
+    result = runner.run(task_file, stdin, timeout=timeout, cwd=root, expect=expect)
+    if result["timed_out"]:
+        output = "TIMEOUT"
+    elif result["output_limited"]:
+        output = "OUTPUT_LIMIT"
+    else:
+        output = result["stdout"].strip()
+        if tolerance is not None:
+            if numeric_mismatch(expected, result["stdout"], *tolerance) is None:
+                output = None
+        elif not result["mismatch"] and find_mismatch(expected, result["stdout"]) is None:
+            output = None
+    return output, result
+
+
+def _fatal(result):
+    return result["timed_out"] or result["output_limited"]
+
+
+def _check_cases(check, cases, jobs):
+    """Проверяет cases, выполняя не больше jobs одновременно.
+
+    Возвращает результаты check по порядку cases. После TIMEOUT или
+    OUTPUT_LIMIT новые случаи не запускаются, уже запущенные дожидаются —
+    результат остаётся префиксом cases.
+    """
+    if jobs <= 1:
+        checked = []
+        for case in cases:
+            checked.append(check(case))
+            if _fatal(checked[-1][1]):
+                break
+        return checked
+
+    checked = {}
+    stopped = False
+    pending = {}
+    remaining = iter(enumerate(cases))
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while True:
+            while not stopped and len(pending) < jobs:
+                item = next(remaining, None)
+                if item is None:
+                    break
+                pending[pool.submit(check, item[1])] = item[0]
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                checked[pending.pop(future)] = future.result()
+                stopped = stopped or _fatal(future.result()[1])
+    return [checked[i] for i in sorted(checked)]
+
+
+def run_differential_test(runner, task_file, test, root=".", jobs=1):
+    """Запускает дифференциальный тест и возвращает запись для results JSON"""
+    count = test.get("count", 100)
+    rng = random.Random(test.get("seed", 0))
+    inputs = list(load_function(test["generator"])(count, rng))
+    expected = list(load_function(test["reference"])(inputs))
+    timeout = test.get("timeout", 5)
+    method = test.get("case_comparison", "exact")
+    if method == "numeric":
+        tolerance = (test.get("abs_tol", DEFAULT_ABS_TOL), test.get("rel_tol", DEFAULT_REL_TOL))
+    elif method == "exact":
+        tolerance = None
+    else:
+        raise ValueError(f"Неизвестный case_comparison: {method}")
+
+    checked = _check_cases(
+        lambda case: _check_case(runner, task_file, case[0], case[1], timeout, root, tolerance),
+        list(zip(inputs, expected)), max(1, jobs))
+
+    failures = [(stdin, exp, output)
+                for stdin, exp, (output, _) in zip(inputs, expected, checked)
+                if output is not None]
+    runs = [result for _, result in checked]
+    entry = {
+        "name": test["name"],
+        "status": "fail" if failures else "pass",
+        "score": 0 if failures else test["max_score"],
+        "output": f"Все {len(inputs)} сгенерированных вводов совпали с эталоном",
+        "wall_time": round(sum(r["wall_time"] for r in runs), 4),
+        "cpu_time": round(sum(r["cpu_time"] for r in runs), 4),
+        "max_rss_kb": max((r["max_rss_kb"] for r in runs), default=0)
+    }
+    stopped = next(((stdin, exp, output)
+                    for stdin, exp, (output, result) in zip(inputs, expected, checked)
+                    if _fatal(result)), None)
+    if stopped:
+        stdin, exp, output = stopped
+        entry["output"] = (f"{output} на вводе {stdin!r}; проверка остановлена, "
+                           f"выполнено {len(checked)} из {len(inputs)}")[:200]
+        entry["counterexample"] = {"input": stdin, "expected_output": exp, "output": output}
+    elif failures:
+        stdin, exp, output = min(failures, key=lambda f: (len(f[0]), f[0]))
+        entry["output"] = (f"Не совпало {len(failures)} из {len(inputs)}; "
+                           f"наименьший ввод {stdin!r}: ожидалось {exp!r}, получено {output!r}")[:200]
+        entry["counterexample"] = {"input": stdin, "expected_output": exp, "output": output}
+    return entry
@@ -0,0 +1,386 @@
+# tools/fast_lint.py
+"""Встроенный быстрый линтер на ast + tokenize.
+
+Проверяет правила, которые важны для учебных задач, без запуска внешних
+линтеров:
+
+* E501 — строка длиннее 79 символов, W291/W293 — пробелы в конце строки,
+  W292 — нет перевода строки в конце файла;
+* E111 — отступ не кратен четырём, W191 — отступ табуляцией;
+* F401 — неиспользуемый импорт, F841 — неиспользуемая локальная переменная;
+* F821 — неопределённое имя; F403 — импорт со звёздочкой, F405 — имя,
+  которое может прийти из такого импорта (вместо F821, как у pyflakes);
+* C0114/C0115/C0116 — нет докстринга у модуля/класса/функции;
+* C0103 — имя не соответствует соглашениям PEP 8.
+
+Оценка 0–10 считается по той же формуле, что и у pylint. F405 имеет тип
+"info" и, как информационные сообщения pylint, в оценку не входит.
+"""
+import ast
+import builtins
+import io
+import re
+import tokenize
+
+MAX_LINE_LENGTH = 79
+
+# Веса сообщений в формуле оценки (как evaluation в pylintrc по умолчанию)
+PYLINT_WEIGHTS = {"error": 5, "warning": 1, "refactor": 1, "convention": 1}
+
+SNAKE_CASE = re.compile(r"^_{0,2}[a-z][a-z0-9_]*_{0,2}$|^_$")
+UPPER_CASE = re.compile(r"^_{0,2}[A-Z][A-Z0-9_]*$")
+PASCAL_CASE = re.compile(r"^_{0,2}[A-Z][a-zA-Z0-9]*$")
+
+# Неявные имена: атрибуты модуля, __class__ в методах, __module__ и
+# __qualname__ в теле класса
+BUILTIN_NAMES = set(dir(builtins)) | {"__file__", "__name__", "__doc__", "__builtins__",
+                                      "__spec__", "__loader__", "__package__", "__cached__",
+                                      "__annotations__", "__class__", "__module__",
+                                      "__qualname__"}
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+COMPREHENSION_NODES = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+SCOPE_NODES = (ast.Module, ast.Lambda, ast.ClassDef, *FUNCTION_NODES, *COMPREHENSION_NODES)
+
+
+def count_statements(tree):
+    """Число операторов — знаменатель формулы оценки pylint"""
+    return sum(isinstance(node, ast.stmt) for node in ast.walk(tree))
+
+
+def pylint_score(messages, statements):
+    if any(m["type"] == "fatal" for m in messages) or statements == 0:
+        return 0.0
+    weighted = sum(PYLINT_WEIGHTS.get(m["type"], 0) for m in messages)
+    return max(0.0, 10.0 - weighted / statements * 10)
+
+
+def _message(line, col, code, kind, text):
+    return {"line": line, "col": col, "code": code, "type": kind, "message": text}
+
+
+def check_lines(source):
+    messages = []
+    lines = source.splitlines()
+    for number, line in enumerate(lines, 1):
+        if len(line) > MAX_LINE_LENGTH:
+            messages.append(_message(number, MAX_LINE_LENGTH + 1, "E501", "convention",
+                                     f"line too long ({len(line)} > {MAX_LINE_LENGTH} characters)"))
+        stripped = line.rstrip()
+        if stripped != line:
+            if stripped:
+                messages.append(_message(number, len(stripped) + 1, "W291", "convention",
+                                         "trailing whitespace"))
+            else:
+                messages.append(_message(number, 1, "W293", "convention",
+                                         "whitespace on blank line"))
+    if source and not source.endswith("\n"):
+        messages.append(_message(len(lines), len(lines[-1]) + 1, "W292", "convention",
+                                 "no newline at end of file"))
+    return messages
+
+
+def check_indentation(source):
+    messages = []
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return messages
+    for token in tokens:
+        if token.type != tokenize.INDENT:
+            continue
+        line = token.start[0]
+        if "\t" in token.string:
+            messages.append(_message(line, 1, "W191", "convention",
+                                     "indentation contains tabs"))
+        elif len(token.string) % 4:
+            messages.append(_message(line, len(token.string) + 1, "E111", "convention",
+                                     "indentation is not a multiple of 4"))
+    return messages
+
+
+class _Scope:
+    def __init__(self, node, parent):
+        self.node = node
+        self.parent = parent
+        self.bound = set()
+        self.globals = set()
+        self.loads = set()
+        self.assigned = {}  # имя -> узел первого присваивания (для F841)
+        self.imports = {}  # имя -> узел импорта (для F401)
+        self.stars = []  # (модуль, узел) импортов со звёздочкой (для F403/F405)
+
+
+def _scope_roots(node):
+    """Узлы верхнего уровня, принадлежащие области видимости node"""
+    if isinstance(node, ast.Lambda):
+        return [node.body]
+    if isinstance(node, COMPREHENSION_NODES):
+        roots = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        for number, generator in enumerate(node.generators):
+            roots.append(generator.target)
+            roots.extend(generator.ifs)
+            # Итерируемое первого генератора вычисляется во внешней области
+            if number:
+                roots.append(generator.iter)
+        return roots
+    return list(node.body)
+
+
+def _outer_parts(node):
+    """Части вложенной области, которые вычисляются во внешней области"""
+    parts = []
+    if isinstance(node, (*FUNCTION_NODES, ast.Lambda)):
+        args = node.args
+        parts.extend(args.defaults)
+        parts.extend(d for d in args.kw_defaults if d is not None)
+        if not isinstance(node, ast.Lambda):
+            for arg in (*args.posonlyargs, *args.args, *args.kwonlyargs, args.vararg, args.kwarg):
+                if arg is not None and arg.annotation is not None:
+                    parts.append(arg.annotation)
+            if node.returns is not None:
+                parts.append(node.returns)
+    if isinstance(node, (*FUNCTION_NODES, ast.ClassDef)):
+        parts.extend(node.decorator_list)
+    if isinstance(node, ast.ClassDef):
+        parts.extend(node.bases)
+        parts.extend(k.value for k in node.keywords)
+    if isinstance(node, COMPREHENSION_NODES):
+        parts.append(node.generators[0].iter)
+    return parts
+
+
+def _scope_children(node):
+    """Узлы, принадлежащие области видимости node, без вложенных областей"""
+    stack = _scope_roots(node)
+    while stack:
+        child = stack.pop()
+        yield child
+        if isinstance(child, SCOPE_NODES):
+            stack.extend(_outer_parts(child))
+            continue
+        stack.extend(ast.iter_child_nodes(child))
+
+
+def _collect_scopes(tree):
+    scopes = []
+    pending = [(tree, None)]
+    while pending:
+        node, parent = pending.pop()
+        scope = _Scope(node, parent)
+        scopes.append(scope)
+
+        if isinstance(node, (*FUNCTION_NODES, ast.Lambda)):
+            args = node.args
+            for arg in (*args.posonlyargs, *args.args, *args.kwonlyargs,
+                        *(a for a in (args.vararg, args.kwarg) if a is not None)):
+                scope.bound.add(arg.arg)
+
+        for child in _scope_children(node):
+            if isinstance(child, SCOPE_NODES):
+                if isinstance(child, (*FUNCTION_NODES, ast.ClassDef)):
+                    scope.bound.add(child.name)
+                pending.append((child, scope))
+            elif isinstance(child, ast.Name):
+                if isinstance(child.ctx, ast.Load):
+                    scope.loads.add(child.id)
+                else:
+                    scope.bound.add(child.id)
+            elif isinstance(child, (ast.Global, ast.Nonlocal)):
+                scope.globals.update(child.names)
+            elif isinstance(child, (ast.Import, ast.ImportFrom)):
+                for alias in child.names:
+                    if alias.name == "*":
+                        module = "." * child.level + (child.module or "")
+                        scope.stars.append((module, child))
+                        continue
+                    name = alias.asname or alias.name.split(".")[0]
+                    scope.bound.add(name)
+                    scope.imports.setdefault(name, child)
+            elif isinstance(child, ast.ExceptHandler) and child.name:
+                scope.bound.add(child.name)
+            elif isinstance(child, (ast.MatchAs, ast.MatchStar)) and child.name:
+                scope.bound.add(child.name)
+            elif isinstance(child, ast.MatchMapping) and child.rest:
+                scope.bound.add(child.rest)
+            elif isinstance(child, ast.AugAssign) and isinstance(child.target, ast.Name):
+                # x += 1 читает x, как и у pyflakes: присваивание до него не F841
+                scope.loads.add(child.target.id)
+            elif isinstance(child, ast.Assign):
+                for target in child.targets:
+                    if isinstance(target, ast.Name):
+                        scope.assigned.setdefault(target.id, target)
+
+        # Имена из global связываются в области модуля
+        if scope.globals and scope.parent is not None:
+            scope.bound -= scope.globals
+            scopes[0].bound |= scope.globals
+
+    return scopes
+
+
+def _is_defined(name, scope):
+    current = scope
+    while current is not None:
+        # Имена класса не видны во вложенных функциях
+        if name in current.bound and (current is scope or not isinstance(current.node, ast.ClassDef)):
+            return True
+        current = current.parent
+    return name in BUILTIN_NAMES
+
+
+def _star_modules(scope):
+    """Модули импортов со звёздочкой, видимых из области"""
+    modules = []
+    current = scope
+    while current is not None:
+        modules.extend(module for module, _ in current.stars)
+        current = current.parent
+    return modules
+
+
+def _used_below(name, scope, scopes):
+    """Используется ли имя в области или во вложенных в неё областях"""
+    for other in scopes:
+        current = other
+        while current is not None:
+            if current is scope:
+                if name in other.loads:
+                    return True
+                break
+            # Вложенная область со своим связыванием имени его перекрывает
+            if name in current.bound and current is not other:
+                break
+            current = current.parent
+    return False
+
+
+def check_names(tree):
+    messages = []
+    scopes = _collect_scopes(tree)
+    exported = set()
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and
+                any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets) and
+                isinstance(node.value, (ast.List, ast.Tuple))):
+            exported.update(e.value for e in node.value.elts if isinstance(e, ast.Constant))
+
+    for scope in scopes:
+        for module, node in scope.stars:
+            messages.append(_message(node.lineno, node.col_offset + 1, "F403", "warning",
+                                     f"'from {module} import *' used; "
+                                     "unable to detect undefined names"))
+
+        stars = _star_modules(scope)
+        for node in _scope_children(scope.node):
+            if (isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and
+                    not _is_defined(node.id, scope)):
+                if stars:
+                    messages.append(_message(node.lineno, node.col_offset + 1, "F405", "info",
+                                             f"'{node.id}' may be undefined, or defined from "
+                                             f"star imports: {', '.join(stars)}"))
+                else:
+                    messages.append(_message(node.lineno, node.col_offset + 1, "F821", "error",
+                                             f"undefined name '{node.id}'"))
+
+        for name, node in scope.imports.items():
+            if name in exported or _used_below(name, scope, scopes):
+                continue
+            messages.append(_message(node.lineno, node.col_offset + 1, "F401", "warning",
+                                     f"'{name}' imported but unused"))
+
+        if isinstance(scope.node, FUNCTION_NODES):
+            for name, node in scope.assigned.items():
+                if name in scope.globals or name == "_" or _used_below(name, scope, scopes):
+                    continue
+                messages.append(_message(node.lineno, node.col_offset + 1, "F841", "warning",
+                                         f"local variable '{name}' is assigned to but never used"))
+    return messages
+
+
+def check_docstrings_and_naming(tree):
+    messages = []
+    if tree.body and ast.get_docstring(tree) is None:
+        messages.append(_message(1, 1, "C0114", "convention", "Missing module docstring"))
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            if not PASCAL_CASE.match(node.name):
+                messages.append(_message(node.lineno, node.col_offset + 1, "C0103", "convention",
+                                         f'Class name "{node.name}" doesn\'t conform to PascalCase'))
+            if not node.name.startswith("_") and ast.get_docstring(node) is None:
+                messages.append(_message(node.lineno, node.col_offset + 1, "C0115", "convention",
+                                         "Missing class docstring"))
+        elif isinstance(node, FUNCTION_NODES):
+            if not SNAKE_CASE.match(node.name):
+                messages.append(_message(node.lineno, node.col_offset + 1, "C0103", "convention",
+                                         f'Function name "{node.name}" doesn\'t conform to snake_case'))
+            if not node.name.startswith("_") and ast.get_docstring(node) is None:
+                messages.append(_message(node.lineno, node.col_offset + 1, "C0116", "convention",
+                                         "Missing function or method docstring"))
+            args = node.args
+            for arg in (*args.posonlyargs, *args.args, *args.kwonlyargs):
+                if not SNAKE_CASE.match(arg.arg):
+                    messages.append(_message(arg.lineno, arg.col_offset + 1, "C0103", "convention",
+                                             f'Argument name "{arg.arg}" doesn\'t conform to snake_case'))
+            seen = set(n for child in _scope_children(node)
+                       if isinstance(child, (ast.Global, ast.Nonlocal)) for n in child.names)
+            for child in _scope_children(node):
+                if (isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store) and
+                        child.id not in seen):
+                    seen.add(child.id)
+                    if not SNAKE_CASE.match(child.id):
+                        messages.append(_message(child.lineno, child.col_offset + 1, "C0103",
+                                                 "convention",
+                                                 f'Variable name "{child.id}" doesn\'t conform to snake_case'))
+
+    # На уровне модуля допустимы и переменные, и константы
+    seen = set()
+    for child in _scope_children(tree):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store) and child.id not in seen:
+            seen.add(child.id)
+            if not (SNAKE_CASE.match(child.id) or UPPER_CASE.match(child.id)):
+                messages.append(_message(child.lineno, child.col_offset + 1, "C0103", "convention",
+                                         f'Module-level name "{child.id}" doesn\'t conform to '
+                                         "snake_case or UPPER_CASE"))
+    return messages
+
+
+def lint_source(source, filename="<string>"):
+    """Возвращает {"messages": [...], "statements": N, "score": 0–10}"""
+    messages = check_lines(source)
+    try:
+        tree = ast.parse(source, filename)
+    except (SyntaxError, ValueError) as e:
+        messages.append(_message(getattr(e, "lineno", None) or 1, getattr(e, "offset", None) or 1,
+                                 "E999", "fatal", f"{type(e).__name__}: {getattr(e, 'msg', e)}"))
+        return {"messages": messages, "statements": 0, "score": 0.0}
+
+    messages += check_indentation(source)
+    messages += check_names(tree)
+    messages += check_docstrings_and_naming(tree)
+    messages.sort(key=lambda m: (m["line"], m["col"], m["code"]))
+    statements = count_statements(tree)
+    return {
+        "messages": messages,
+        "statements": statements,
+        "score": round(pylint_score(messages, statements), 2)
+    }
+
+
+def lint_file(filename):
+    with open(filename, "rb") as f:
+        raw = f.read()
+    try:
+        source = raw.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return {
+            "messages": [_message(1, 1, "E902", "fatal", f"UnicodeDecodeError: {e.reason}")],
+            "statements": 0,
+            "score": 0.0
+        }
+    return lint_source(source, filename)
+
+
+def format_message(filename, message):
+    return f"{filename}:{message['line']}:{message['col']}: {message['code']} {message['message']}"
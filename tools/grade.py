@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Полная проверка в одном процессе: прогон → агрегация → отчёт.
+
+Использование:
+    python3 tools/grade.py [параметры run_all_tests.py]
+
+tasks.json читается один раз, результаты передаются между стадиями в
+памяти. Файлы для артефакта те же, что у отдельных скриптов:
+results/{task_id}.json, {task_id}_aggregated.txt и отчёт в
+GITHUB_STEP_SUMMARY (локально — в stdout). С --gradebook прогон также
+записывается в журнал оценок SQLite.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import incremental
+import tracing
+import watch
+from aggregate_all import aggregate
+from gradebook import Gradebook, default_student
+from report_summary import build_summary, write_summary
+from run_all_tests import add_arguments, run_tests
+from runner import install_signal_handlers
+from utils import load_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Прогон тестов, агрегация и итоговый отчёт")
+    add_arguments(parser)
+    parser.add_argument("--gradebook", metavar="DB",
+                        help="Записать прогон в журнал оценок SQLite")
+    parser.add_argument("--student", default=None,
+                        help="Имя студента для журнала (по умолчанию — из GITHUB_REPOSITORY)")
+    args = parser.parse_args()
+    install_signal_handlers()
+
+    config_path = ".github/tasks.json"
+    if args.watch:
+        # Локальная обратная связь: только таблица, без агрегации и отчёта
+        watch.watch(config_path, args)
+        return
+
+    with tracing.session("grade", args.trace, args.profile):
+        with tracing.span("load_config"):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+
+        with tracing.span("stage:run"):
+            results = run_tests(config, args)
+            # В инкрементальном режиме непроверенные задачи берутся с диска
+            all_results = load_results(config, results)
+        with tracing.span("stage:aggregate"):
+            aggregate(config, all_results)
+        with tracing.span("stage:summary"):
+            write_summary(build_summary(config, all_results))
+
+        if args.gradebook:
+            with tracing.span("stage:gradebook"):
+                book = Gradebook(args.gradebook)
+                try:
+                    book.record_run(args.student or default_student(),
+                                    incremental.current_commit(), all_results, config)
+                finally:
+                    book.close()
+
+if __name__ == "__main__":
+    main()
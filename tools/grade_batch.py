@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Пакетная проверка всех сдач из каталога.
+
+Использование:
+    python3 tools/grade_batch.py <root> [--output grades.jsonl] [--shard K/N] [--resume]
+
+Каждый подкаталог <root>, в котором есть хотя бы один файл задачи из
+tasks.json, считается сдачей одного студента. Сдачи проверяются в пуле
+процессов, а по мере готовности в вывод пишется одна JSONL-запись на
+студента:
+
+    {"student": ..., "path": ..., "commit": ..., "graded_at": <unix-время>,
+     "scores": {task_id: score}, "total": ..., "max_total": ...,
+     "results": {task_id: <как в results/{task_id}.json>}}
+
+Вывод можно загрузить в журнал оценок: tools/gradebook.py import-batch.
+
+Если проверка сдачи упала, пишется запись с полем "error", и пакет
+продолжает работу.
+
+Проверку можно разделить между машинами: с --shard K/N проверяются
+только сдачи, у которых хэш имени студента по модулю N равен K, и в
+записи добавляется поле "shard". Рядом с --output пишется манифест
+<output>.manifest.json: {"shard": "K/N", "students": [...]} — по нему
+tools/merge_shards.py проверяет, что все шарды запущены и завершены,
+даже если в шард не попало ни одной сдачи. Каждая запись сбрасывается
+на диск сразу после проверки, а с --resume файл --output только
+дописывается: уже проверенные студенты пропускаются, поэтому прерванный
+запуск продолжается с места остановки. Студенты с записью "error"
+проверяются заново, новая запись дописывается после старой.
+
+По SIGINT/SIGTERM программы студентов и процессы пула завершаются
+(runner.kill_all).
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import incremental
+from run_all_tests import grade_submission
+from runner import (DEFAULT_OUTPUT_LIMIT, RUNNERS, ExecutionLedger, init_worker,
+                    install_signal_handlers, make_runner, register_pool)
+
+
+def student_name(path):
+    return os.path.basename(os.path.normpath(path))
+
+
+def shard_of(student, count):
+    """Номер шарда студента — одинаковый на всех машинах и при любом порядке сдач"""
+    digest = hashlib.sha256(student.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def parse_shard(text):
+    """'K/N' → (K, N), 0 ≤ K < N"""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ожидается K/N, получено {text!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Нужно 0 ≤ K < N, получено {text!r}")
+    return index, count
+
+
+def manifest_path(output):
+    return f"{output}.manifest.json"
+
+
+def write_manifest(output, shard, students):
+    """Манифест шарда рядом с выводом: метка K/N и все его студенты"""
+    path = manifest_path(output)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"shard": "{}/{}".format(*shard), "students": students}, f,
+                  ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    """Студенты, уже успешно проверенные в журнале path.
+
+    Студенты, у которых последняя запись — ошибка проверки, в множество не
+    входят и проверяются заново. Недописанная последняя строка (запуск
+    прерван посреди записи) отрезается, чтобы следующие записи начинались
+    с новой строки.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb+") as f:
+        complete = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            complete += len(line)
+            try:
+                record = json.loads(line)
+                student = record["student"]
+            except (ValueError, KeyError):
+                continue
+            if "error" in record:
+                done.discard(student)
+            else:
+                done.add(student)
+        f.truncate(complete)
+    return done
+
+
+def discover_submissions(root, config):
+    """Возвращает отсортированный список каталогов сдач внутри root"""
+    task_files = {task["file"] for task in config["tasks"]}
+    submissions = []
+    for entry in sorted(os.scandir(root), key=lambda e: e.name):
+        if not entry.is_dir() or entry.name.startswith("."):
+            continue
+        if any(os.path.exists(os.path.join(entry.path, f)) for f in task_files):
+            submissions.append(entry.path)
+    return submissions
+
+
+def grade_student(path, config, runner_name, jobs, output_limit=DEFAULT_OUTPUT_LIMIT):
+    """Проверяет одну сдачу. Выполняется в процессе пула"""
+    runner = ExecutionLedger(make_runner(runner_name, jobs, output_limit))
+    try:
+        # Журнал проверки одной сдачи в пакетном режиме не нужен
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                results = grade_submission(config, runner, executor, root=path, jobs=jobs)
+    finally:
+        runner.close()
+
+    scores = {task_id: sum(t.get("score", 0) for t in data["tests"])
+              for task_id, data in results.items()}
+    return {
+        "student": student_name(path),
+        "path": path,
+        "commit": incremental.current_commit(path),
+        # Время проверки, а не импорта: по нему журнал оценок выбирает последний прогон
+        "graded_at": time.time(),
+        "scores": scores,
+        "total": sum(scores.values()),
+        "max_total": sum(task["max_score"] for task in config["tasks"]),
+        "results": results
+    }
+
+
+def error_record(path, message):
+    return {
+        "student": student_name(path),
+        "path": path,
+        "error": message
+    }
+
+
+def _make_pool(processes):
+    # Процессы пула по SIGTERM убивают свои программы, kill_all их завершает
+    executor = ProcessPoolExecutor(max_workers=processes, initializer=init_worker)
+    register_pool(executor)
+    return executor
+
+
+def grade_batch(submissions, config, processes, runner_name="subprocess", jobs=1,
+                output_limit=DEFAULT_OUTPUT_LIMIT):
+    """Проверяет сдачи в пуле процессов и выдаёт записи по мере готовности.
+
+    Одновременно в пуле находится не больше 2 * processes сдач, поэтому
+    память не растёт с числом студентов. Если процесс пула аварийно
+    завершился, пул пересоздаётся, а незавершённые сдачи перепроверяются
+    один раз.
+    """
+    queue = list(reversed(submissions))
+    retried = set()
+    executor = _make_pool(processes)
+    in_flight = {}
+    try:
+        while queue or in_flight:
+            while queue and len(in_flight) < 2 * processes:
+                path = queue.pop()
+                in_flight[executor.submit(grade_student, path, config, runner_name, jobs,
+                                          output_limit)] = path
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    if path in retried:
+                        yield error_record(path, "Процесс проверки аварийно завершился")
+                    else:
+                        retried.add(path)
+                        queue.append(path)
+                except Exception as e:
+                    yield error_record(path, f"{type(e).__name__}: {e}")
+
+            if broken:
+                # Все задания сломанного пула завершатся с той же ошибкой
+                for future, path in in_flight.items():
+                    future.cancel()
+                    if path in retried:
+                        yield error_record(path, "Процесс проверки аварийно завершился")
+                    else:
+                        retried.add(path)
+                        queue.append(path)
+                in_flight.clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = _make_pool(processes)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная проверка каталога сдач")
+    parser.add_argument("root", help="Каталог с клонированными репозиториями студентов")
+    parser.add_argument("--config", default=".github/tasks.json",
+                        help="Конфигурация задач (по умолчанию — из текущего репозитория)")
+    parser.add_argument("--output", "-o", default="-",
+                        help="Файл для JSONL-записей (по умолчанию stdout)")
+    parser.add_argument("--processes", "-p", type=int, default=os.cpu_count() or 1,
+                        help="Число одновременно проверяемых сдач")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Число параллельных тестов внутри одной сдачи")
+    parser.add_argument("--runner", choices=RUNNERS, default="subprocess")
+    parser.add_argument("--output-limit", type=int, default=DEFAULT_OUTPUT_LIMIT // 1024,
+                        help="Лимит вывода программы в КБ на поток")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N",
+                        help="Проверять только шард K из N (K с 0)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Дописывать в --output, пропуская уже записанных студентов")
+    args = parser.parse_args()
+    if args.resume and args.output == "-":
+        parser.error("--resume требует --output")
+    install_signal_handlers()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    submissions = discover_submissions(args.root, config)
+    print(f"🔍 Найдено сдач: {len(submissions)}", file=sys.stderr)
+    if args.shard:
+        index, count = args.shard
+        submissions = [path for path in submissions
+                       if shard_of(student_name(path), count) == index]
+        print(f"🧩 Шард {index}/{count}: сдач {len(submissions)}", file=sys.stderr)
+        if args.output != "-":
+            write_manifest(args.output, args.shard, [student_name(p) for p in submissions])
+    if args.resume:
+        done = load_checkpoint(args.output)
+        submissions = [path for path in submissions if student_name(path) not in done]
+        print(f"⏩ Уже в журнале: {len(done)}, осталось: {len(submissions)}", file=sys.stderr)
+
+    if args.output == "-":
+        out = sys.stdout
+    else:
+        out = open(args.output, "a" if args.resume else "w", encoding="utf-8")
+    graded = 0
+    try:
+        for record in grade_batch(submissions, config, max(1, args.processes),
+                                  args.runner, max(1, args.jobs),
+                                  args.output_limit * 1024):
+            if args.shard:
+                record["shard"] = "{}/{}".format(*args.shard)
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if out is not sys.stdout:
+                # Запись в журнале переживает и падение машины
+                os.fsync(out.fileno())
+            graded += 1
+            if "error" in record:
+                print(f"❌ {record['student']}: {record['error']}", file=sys.stderr)
+            else:
+                print(f"📦 {record['student']}: {record['total']}/{record['max_total']}",
+                      file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ Проверено сдач: {graded}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Локальный сервис проверки с очередью и пулом процессов.
+
+Использование:
+    python3 tools/grade_server.py [--port 8765] [--processes 4] [--queue-size 100]
+
+API (JSON):
+    POST /submissions   {"path": "/каталог/сдачи", "student": ..., "priority": 0}
+                        или архив .tar/.tar.gz/.zip в теле запроса
+                        (Content-Type: application/x-tar, application/gzip,
+                        application/zip; student и priority — в query-строке)
+                        → 202 {"id": ...}; 503 с Retry-After, если очередь полна
+    GET /submissions/<id>
+                        → {"state": queued|running|done|error, ...}; у готовой
+                        сдачи "aggregated" — {task_id: AGGREGATED_RESULT}, как
+                        у aggregate_all.py, плюс баллы и results
+    GET /stats          → глубина очереди, число сдач в работе и задержки
+                        (ожидание в очереди и полное время, p50/p95)
+
+Меньшее значение priority проверяется раньше (например, пересдача до
+дедлайна — 0, обычная сдача — 10), при равном приоритете — по порядку
+поступления. Очередь ограничена: при заполнении сервис отвечает 503, и
+клиент повторяет запрос позже. Проверка выполняется функцией
+grade_batch.grade_student в постоянном пуле процессов, tasks.json
+читается один раз при старте.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import queue
+import shutil
+import signal
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+from aggregate_all import make_aggregated
+from grade_batch import grade_student
+from runner import RUNNERS, init_worker, kill_all, register_pool
+from utils import encode_result_for_classroom, percentile
+
+DEFAULT_PRIORITY = 10
+# Сколько завершённых сдач хранится для GET /submissions/<id>
+MAX_FINISHED = 1000
+# По скольким последним сдачам считаются задержки
+LATENCY_WINDOW = 1000
+MAX_ARCHIVE_BYTES = 16 * 1024 * 1024
+# Суммарный размер файлов архива после распаковки
+MAX_EXTRACTED_BYTES = 64 * 1024 * 1024
+
+ARCHIVE_TYPES = {
+    "application/x-tar": "tar",
+    "application/gzip": "tar",
+    "application/x-gzip": "tar",
+    "application/zip": "zip",
+}
+
+
+def _check_extracted_size(total):
+    if total > MAX_EXTRACTED_BYTES:
+        raise ValueError(f"Архив после распаковки больше {MAX_EXTRACTED_BYTES} байт")
+
+
+def extract_archive(data, kind, directory):
+    """Распаковывает архив сдачи и возвращает каталог с файлами задач.
+
+    Размер после распаковки ограничен MAX_EXTRACTED_BYTES и проверяется
+    по заголовкам до записи на диск.
+    """
+    if kind == "zip":
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            # zipfile не выдаёт больше file_size байт — заголовкам можно верить
+            _check_extracted_size(sum(info.file_size for info in archive.infolist()))
+            for name in archive.namelist():
+                target = os.path.realpath(os.path.join(directory, name))
+                if not target.startswith(os.path.realpath(directory) + os.sep):
+                    raise ValueError(f"Недопустимый путь в архиве: {name}")
+            archive.extractall(directory)
+    else:
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            _check_extracted_size(sum(member.size for member in archive.getmembers()
+                                      if member.isfile()))
+            if hasattr(tarfile, "data_filter"):
+                archive.extractall(directory, filter="data")
+            else:
+                for member in archive.getmembers():
+                    target = os.path.realpath(os.path.join(directory, member.name))
+                    if (not target.startswith(os.path.realpath(directory) + os.sep) or
+                            not (member.isfile() or member.isdir())):
+                        raise ValueError(f"Недопустимый элемент архива: {member.name}")
+                archive.extractall(directory)
+    # Архив с одним каталогом верхнего уровня (как у git archive --prefix)
+    entries = os.listdir(directory)
+    if len(entries) == 1 and os.path.isdir(os.path.join(directory, entries[0])):
+        return os.path.join(directory, entries[0])
+    return directory
+
+
+class GradingService:
+    def __init__(self, config, processes, queue_size, runner_name="subprocess", jobs=1):
+        self.config = config
+        self.processes = processes
+        self.runner_name = runner_name
+        self.jobs = jobs
+        self.queue = queue.PriorityQueue(maxsize=queue_size)
+        self.jobs_by_id = OrderedDict()
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.closed = False
+        self.wait_times = deque(maxlen=LATENCY_WINDOW)
+        self.total_times = deque(maxlen=LATENCY_WINDOW)
+        self.pool = self._make_pool()
+        self.workdir = tempfile.mkdtemp(prefix="grade_server_")
+        self.workers = [threading.Thread(target=self._worker, daemon=True)
+                        for _ in range(processes)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, path, student=None, priority=DEFAULT_PRIORITY, cleanup=None):
+        """Ставит сдачу в очередь. Возвращает id или None, если очередь полна"""
+        job = {
+            "id": uuid.uuid4().hex,
+            "state": "queued",
+            "student": student or os.path.basename(os.path.normpath(path)),
+            "priority": priority,
+            "submitted_at": time.time(),
+        }
+        item = (priority, next(self.counter), job, path, cleanup)
+        with self.lock:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.rejected += 1
+                return None
+            self.jobs_by_id[job["id"]] = job
+        return job["id"]
+
+    def _make_pool(self):
+        # Процессы пула по SIGTERM убивают свои программы, kill_all их завершает
+        pool = ProcessPoolExecutor(max_workers=self.processes, initializer=init_worker)
+        register_pool(pool)
+        return pool
+
+    def _grade(self, path):
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Сервис остановлен")
+            pool = self.pool
+        try:
+            return pool.submit(grade_student, path, self.config, self.runner_name,
+                               self.jobs).result()
+        except BrokenProcessPool:
+            # Процесс пула упал — пул пересоздаётся для следующих сдач. Ошибку
+            # получают все потоки со сдачами в этом пуле, пересоздаёт его первый
+            with self.lock:
+                if self.pool is pool and not self.closed:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self.pool = self._make_pool()
+            raise
+
+    def _worker(self):
+        while True:
+            _, _, job, path, cleanup = self.queue.get()
+            started = time.time()
+            with self.lock:
+                job["state"] = "running"
+                self.running += 1
+            try:
+                record = self._grade(path)
+                tasks = {task["id"]: task for task in self.config["tasks"]}
+                outcome = {
+                    "state": "done",
+                    "scores": record["scores"],
+                    "total": record["total"],
+                    "max_total": record["max_total"],
+                    "aggregated": {task_id: encode_result_for_classroom(
+                                       make_aggregated(tasks[task_id], data))
+                                   for task_id, data in record["results"].items()},
+                    "results": record["results"]
+                }
+            except Exception as e:
+                outcome = {"state": "error", "error": f"{type(e).__name__}: {e}"}
+            finally:
+                if cleanup:
+                    shutil.rmtree(cleanup, ignore_errors=True)
+                finished = time.time()
+                with self.lock:
+                    job.update(outcome, finished_at=finished)
+                    self.running -= 1
+                    if job["state"] == "done":
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                    self.wait_times.append(started - job["submitted_at"])
+                    self.total_times.append(finished - job["submitted_at"])
+                    self._evict()
+                self.queue.task_done()
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self.jobs_by_id.items()
+                    if job["state"] in ("done", "error")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            del self.jobs_by_id[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs_by_id.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self):
+        with self.lock:
+            waits, totals = list(self.wait_times), list(self.total_times)
+            return {
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_p50": percentile(waits, 0.5),
+                "wait_p95": percentile(waits, 0.95),
+                "latency_p50": percentile(totals, 0.5),
+                "latency_p95": percentile(totals, 0.95),
+            }
+
+    def close(self):
+        # Не дожидаемся проверок: программы и процессы пула завершаются сразу,
+        # сломанный этим пул больше не пересоздаётся
+        with self.lock:
+            self.closed = True
+        kill_all()
+        self.pool.shutdown(cancel_futures=True)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}", file=sys.stderr)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self._send(200, self.service.stats())
+        elif url.path.startswith("/submissions/"):
+            job = self.service.get(url.path.rsplit("/", 1)[-1])
+            if job is None:
+                self._send(404, {"error": "Сдача не найдена"})
+            else:
+                self._send(200, job)
+        else:
+            self._send(404, {"error": "Неизвестный путь"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/submissions":
+            self._send(404, {"error": "Неизвестный путь"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_ARCHIVE_BYTES:
+            self._send(413, {"error": "Слишком большой запрос"})
+            return
+        data = self.rfile.read(length)
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        cleanup = None
+        try:
+            if content_type in ARCHIVE_TYPES:
+                cleanup = tempfile.mkdtemp(dir=self.service.workdir)
+                path = extract_archive(data, ARCHIVE_TYPES[content_type], cleanup)
+                student = query.get("student")
+                priority = int(query.get("priority", DEFAULT_PRIORITY))
+            else:
+                request = json.loads(data or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("ожидается JSON-объект")
+                path = request["path"]
+                if not isinstance(path, str) or not os.path.isdir(path):
+                    raise ValueError(f"Каталог {path} не найден")
+                student = request.get("student")
+                priority = int(request.get("priority", DEFAULT_PRIORITY))
+        except (ValueError, TypeError, KeyError, tarfile.TarError, zipfile.BadZipFile) as e:
+            if cleanup:
+                shutil.rmtree(cleanup, ignore_errors=True)
+            self._send(400, {"error": f"Некорректная сдача: {e}"})
+            return
+
+        job_id = self.service.submit(path, student, priority, cleanup)
+        if job_id is None:
+            if cleanup:
+                shutil.rmtree(cleanup, ignore_errors=True)
+            self._send(503, {"error": "Очередь заполнена, повторите позже"},
+                       {"Retry-After": "5"})
+            return
+        self._send(202, {"id": job_id})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный сервис проверки сдач")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--config", default=".github/tasks.json")
+    parser.add_argument("--processes", "-p", type=int, default=os.cpu_count() or 1,
+                        help="Число одновременно проверяемых сдач")
+    parser.add_argument("--queue-size", type=int, default=100,
+                        help="Максимальная длина очереди; сверх неё — 503")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Число параллельных тестов внутри одной сдачи")
+    parser.add_argument("--runner", choices=RUNNERS, default="subprocess")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    service = GradingService(config, max(1, args.processes), max(1, args.queue_size),
+                             args.runner, max(1, args.jobs))
+    Handler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"🚀 Сервис проверки: http://{args.host}:{server.server_port}", file=sys.stderr)
+    # SIGTERM (systemd, docker stop) завершает сервис так же, как Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Сервис остановлен", file=sys.stderr)
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    main()
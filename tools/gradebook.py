@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Журнал оценок в SQLite.
+
+Каждый прогон проверки (одной сдачи или пакета из grade_batch.py)
+записывается в локальную базу: таблица runs — по строке на прогон,
+results — по строке на тест. Индексы (task, student) и (commit_sha)
+позволяют отвечать на вопросы по всему классу без разбора артефактов.
+
+Использование:
+    python3 tools/gradebook.py import-batch grades.jsonl
+    python3 tools/gradebook.py import-results --student ivanov
+    python3 tools/gradebook.py leaderboard [--task task_02_refactor]
+    python3 tools/gradebook.py pass-rates [--task task_01]
+    python3 tools/gradebook.py history [--student ivanov] [--task task_01]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import incremental
+from utils import load_results
+
+DEFAULT_DB = "gradebook.db"
+
+# Сколько прогонов записывается в одной транзакции при импорте пакета
+BATCH_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    student TEXT NOT NULL,
+    commit_sha TEXT,
+    graded_at REAL NOT NULL,
+    total INTEGER NOT NULL,
+    max_total INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    student TEXT NOT NULL,
+    commit_sha TEXT,
+    task TEXT NOT NULL,
+    test TEXT NOT NULL,
+    status TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    max_score INTEGER,
+    output TEXT,
+    wall_time REAL,
+    cpu_time REAL,
+    max_rss_kb INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_results_task_student ON results(task, student);
+CREATE INDEX IF NOT EXISTS idx_results_commit ON results(commit_sha);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_student ON runs(student);
+CREATE INDEX IF NOT EXISTS idx_runs_student_graded ON runs(student, graded_at, id);
+"""
+
+# Последний по времени проверки прогон каждого студента (при равном времени —
+# записанный позже). Порядок импорта не важен: старый шард, загруженный после
+# нового, не становится последним.
+LATEST_RUNS = ("SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+               "(PARTITION BY student ORDER BY graded_at DESC, id DESC) AS n FROM runs) "
+               "WHERE n = 1")
+
+
+def default_student():
+    """Имя студента для одиночного прогона: репозиторий Classroom или каталог"""
+    repository = os.environ.get("GITHUB_REPOSITORY")
+    if repository:
+        return repository.rsplit("/", 1)[-1]
+    return os.path.basename(os.getcwd())
+
+
+class Gradebook:
+    def __init__(self, path=DEFAULT_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def _insert_run(self, student, commit, results, config, graded_at):
+        test_max = {(task["id"], test["name"]): test["max_score"]
+                    for task in config["tasks"] for test in task.get("tests", [])}
+        # У проверки рефакторинга один тест на весь балл задачи
+        task_max = {task["id"]: task["max_score"] for task in config["tasks"]}
+        total = sum(t.get("score", 0) for data in results.values() for t in data["tests"])
+        max_total = sum(task["max_score"] for task in config["tasks"])
+        cursor = self.conn.execute(
+            "INSERT INTO runs (student, commit_sha, graded_at, total, max_total) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (student, commit, graded_at, total, max_total))
+        run_id = cursor.lastrowid
+
+        rows = []
+        for task_id, data in results.items():
+            single = task_max.get(task_id) if len(data["tests"]) == 1 else None
+            for t in data["tests"]:
+                max_score = t.get("max_score", test_max.get((task_id, t["name"]), single))
+                rows.append((run_id, student, commit, task_id, t["name"], t["status"],
+                             t.get("score", 0), max_score, t.get("output"),
+                             t.get("wall_time"), t.get("cpu_time"), t.get("max_rss_kb")))
+        self.conn.executemany(
+            "INSERT INTO results (run_id, student, commit_sha, task, test, status, score, "
+            "max_score, output, wall_time, cpu_time, max_rss_kb) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return run_id
+
+    def record_run(self, student, commit, results, config, graded_at=None):
+        """Записывает один прогон {task_id: результат} в одной транзакции"""
+        with self.conn:
+            return self._insert_run(student, commit, results, config,
+                                    graded_at or time.time())
+
+    def record_batch(self, records, config):
+        """Записывает записи grade_batch.py, по BATCH_SIZE прогонов на транзакцию.
+
+        Записи с ошибкой проверки пропускаются. Возвращает число записанных.
+        """
+        written = 0
+        pending = []
+
+        def flush():
+            with self.conn:
+                for record in pending:
+                    self._insert_run(record["student"], record.get("commit"),
+                                     record["results"], config,
+                                     record.get("graded_at") or time.time())
+
+        for record in records:
+            if "error" in record:
+                continue
+            pending.append(record)
+            if len(pending) >= BATCH_SIZE:
+                flush()
+                written += len(pending)
+                pending.clear()
+        if pending:
+            flush()
+            written += len(pending)
+        return written
+
+    def leaderboard(self, task=None, limit=20):
+        """[(студент, баллы, максимум)] по последним прогонам"""
+        if task is None:
+            query = (f"SELECT student, total, max_total FROM runs WHERE id IN ({LATEST_RUNS}) "
+                     "ORDER BY total DESC, student LIMIT ?")
+            return self.conn.execute(query, (limit,)).fetchall()
+        query = (f"SELECT student, SUM(score), SUM(max_score) FROM results "
+                 f"WHERE task = ? AND run_id IN ({LATEST_RUNS}) "
+                 "GROUP BY student ORDER BY SUM(score) DESC, student LIMIT ?")
+        return self.conn.execute(query, (task, limit)).fetchall()
+
+    def pass_rates(self, task=None):
+        """[(задача, тест, сдач, прошло)] по последним прогонам студентов"""
+        query = (f"SELECT task, test, COUNT(*), SUM(status = 'pass') FROM results "
+                 f"WHERE run_id IN ({LATEST_RUNS})")
+        params = ()
+        if task is not None:
+            query += " AND task = ?"
+            params = (task,)
+        query += " GROUP BY task, test ORDER BY task, MIN(rowid)"
+        return self.conn.execute(query, params).fetchall()
+
+    def history(self, student=None, task=None):
+        """[(время, студент, коммит, баллы)] — баллы каждого прогона по времени"""
+        conditions, params = [], []
+        if task is not None:
+            conditions.append("results.task = ?")
+            params.append(task)
+        if student is not None:
+            conditions.append("results.student = ?")
+            params.append(student)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        query = ("SELECT runs.graded_at, runs.student, runs.commit_sha, SUM(results.score) "
+                 f"FROM results JOIN runs ON runs.id = results.run_id {where}"
+                 "GROUP BY results.run_id ORDER BY runs.graded_at, runs.id")
+        return self.conn.execute(query, params).fetchall()
+
+    def latest_results(self, student):
+        """Последний прогон студента в формате {task_id: results/{task_id}.json}"""
+        row = self.conn.execute("SELECT id FROM runs WHERE student = ? "
+                                "ORDER BY graded_at DESC, id DESC LIMIT 1", (student,)).fetchone()
+        if row is None:
+            return {}
+        results = {}
+        for task, name, status, score, output, wall, cpu, rss in self.conn.execute(
+                "SELECT task, test, status, score, output, wall_time, cpu_time, max_rss_kb "
+                "FROM results WHERE run_id = ? ORDER BY rowid", row):
+            entry = {"name": name, "status": status, "score": score, "output": output}
+            if wall is not None:
+                entry.update(wall_time=wall, cpu_time=cpu, max_rss_kb=rss)
+            results.setdefault(task, {"version": 1, "tests": []})["tests"].append(entry)
+        return results
+
+    def close(self):
+        self.conn.close()
+
+
+def print_table(header, rows):
+    print("| " + " | ".join(header) + " |")
+    print("|" + "|".join("-" * (len(h) + 2) for h in header) + "|")
+    for row in rows:
+        print("| " + " | ".join(str(v) for v in row) + " |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Журнал оценок в SQLite")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Файл базы SQLite")
+    parser.add_argument("--config", default=".github/tasks.json")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("import-batch", help="Импорт JSONL из grade_batch.py")
+    batch.add_argument("path")
+
+    single = commands.add_parser("import-results", help="Импорт results/ текущего прогона")
+    single.add_argument("--student", default=None)
+    single.add_argument("--commit", default=None)
+    single.add_argument("--results-dir", default="results")
+
+    board = commands.add_parser("leaderboard", help="Рейтинг по последним прогонам")
+    board.add_argument("--task")
+    board.add_argument("--limit", type=int, default=20)
+
+    rates = commands.add_parser("pass-rates", help="Доля прошедших по каждому тесту")
+    rates.add_argument("--task")
+
+    history = commands.add_parser("history", help="Баллы по прогонам во времени")
+    history.add_argument("--student")
+    history.add_argument("--task")
+
+    args = parser.parse_args()
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    book = Gradebook(args.db)
+    try:
+        if args.command == "import-batch":
+            with open(args.path, "r", encoding="utf-8") as f:
+                records = (json.loads(line) for line in f if line.strip())
+                written = book.record_batch(records, config)
+            print(f"📥 Записано прогонов: {written}")
+        elif args.command == "import-results":
+            student = args.student or default_student()
+            commit = args.commit or incremental.current_commit()
+            book.record_run(student, commit, load_results(config, results_dir=args.results_dir),
+                            config)
+            print(f"📥 Записан прогон {student}")
+        elif args.command == "leaderboard":
+            print_table(["#", "Студент", "Баллы", "Максимум"],
+                        [(i, *row) for i, row in enumerate(book.leaderboard(args.task, args.limit), 1)])
+        elif args.command == "pass-rates":
+            print_table(["Задание", "Тест", "Сдач", "Прошло", "%"],
+                        [(task, test, n, passed, f"{100 * passed // n}")
+                         for task, test, n, passed in book.pass_rates(args.task)])
+        elif args.command == "history":
+            print_table(["Время", "Студент", "Коммит", "Баллы"],
+                        [(time.strftime("%Y-%m-%d %H:%M", time.localtime(at)), student,
+                          (commit or "")[:8], score)
+                         for at, student, commit, score in book.history(args.student, args.task)])
+    finally:
+        book.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# tools/incremental.py
+"""Инкрементальная проверка по git diff.
+
+После каждого прогона в results/last_graded.json записывается проверенный
+коммит. В следующий раз изменённые с него файлы сопоставляются с полем
+"file" задач из tasks.json (и "checker" для проверок рефакторинга), и
+перепроверяются только затронутые задачи.
+
+Если в файлах задач или проверки есть незакоммиченные изменения,
+результаты не соответствуют ни одному коммиту — тогда состояние
+удаляется, и следующий инкрементальный прогон будет полным.
+"""
+import json
+import os
+import subprocess
+
+STATE_FILE = "last_graded.json"
+
+# Изменение этих путей меняет саму проверку — тогда перепроверяется всё
+GRADER_PATHS = (".github/tasks.json", "tools/")
+
+
+def _git(args, root="."):
+    result = subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def current_commit(root="."):
+    out = _git(["rev-parse", "HEAD"], root)
+    return out.strip() if out else None
+
+
+def changed_paths(since, root="."):
+    """Файлы, изменённые с коммита since, включая незакоммиченные и новые.
+
+    Возвращает None, если сравнение невозможно (например, коммит
+    отсутствует в истории после force-push).
+    """
+    # -z: пути без кавычек и экранирования, в том числе с пробелами и кириллицей
+    diff = _git(["diff", "--name-only", "-z", since], root)
+    untracked = _git(["ls-files", "--others", "--exclude-standard", "-z"], root)
+    if diff is None or untracked is None:
+        return None
+    return {path for path in (diff + untracked).split("\0") if path}
+
+
+def graded_paths(config):
+    """Пути, от которых зависят результаты проверки"""
+    paths = list(GRADER_PATHS)
+    for task in config["tasks"]:
+        paths.append(task["file"])
+        if task.get("checker"):
+            paths.append(task["checker"])
+    # Чекер вне репозитория git не примет в pathspec
+    return [path for path in paths if not os.path.isabs(path)]
+
+
+def has_local_changes(config, root="."):
+    """Есть ли незакоммиченные или новые файлы среди graded_paths.
+
+    Если git недоступен, считается, что изменения есть.
+    """
+    out = _git(["status", "--porcelain", "--", *graded_paths(config)], root)
+    return out is None or bool(out.strip())
+
+
+def load_state(results_dir="results"):
+    try:
+        with open(os.path.join(results_dir, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(commit, results_dir="results"):
+    os.makedirs(results_dir, exist_ok=True)
+    with open(os.path.join(results_dir, STATE_FILE), "w", encoding="utf-8") as f:
+        json.dump({"commit": commit}, f, ensure_ascii=False, indent=2)
+
+
+def clear_state(results_dir="results"):
+    try:
+        os.remove(os.path.join(results_dir, STATE_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def affected_tasks(config, results_dir="results", root="."):
+    """Возвращает множество task_id для перепроверки или None для полного прогона"""
+    state = load_state(results_dir)
+    if not state or not state.get("commit"):
+        return None
+    changed = changed_paths(state["commit"], root)
+    if changed is None:
+        return None
+    if any(path == prefix or path.startswith(prefix) for path in changed for prefix in GRADER_PATHS):
+        return None
+
+    affected = set()
+    for task in config["tasks"]:
+        if task["file"] in changed or task.get("checker") in changed:
+            affected.add(task["id"])
+        elif not os.path.exists(os.path.join(results_dir, f"{task['id']}.json")):
+            # Предыдущего результата нет — переносить нечего
+            affected.add(task["id"])
+    return affected
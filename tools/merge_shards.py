@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Слияние выводов шардов grade_batch.py.
+
+Использование:
+    python3 tools/merge_shards.py shard_0.jsonl shard_1.jsonl ... \\
+        [--output grades.jsonl] [--results-dir merged]
+
+Записи всех шардов объединяются по студенту; если студент встречается
+несколько раз, берётся последняя запись. По манифестам шардов
+(<shard>.manifest.json, их пишет grade_batch.py --shard) проверяется, что
+шарды покрывают все номера 0..N-1 — в том числе шарды без единой сдачи —
+и что у каждого студента из манифеста есть запись. Общий JSONL сортируется по имени
+студента и загружается в журнал оценок так же, как вывод одного
+grade_batch.py (tools/gradebook.py import-batch). С --results-dir для
+каждого студента создаётся каталог <dir>/<student>/ с results/{task_id}.json
+и {task_id}_aggregated.txt — теми же файлами, что run_all_tests.py и
+aggregate_all.py пишут в его репозитории.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from aggregate_all import make_aggregated
+from grade_batch import manifest_path
+from run_all_tests import write_result
+from utils import encode_result_for_classroom, load_results
+
+
+def read_manifests(paths):
+    """Манифесты шардов по путям выводов и список выводов без манифеста"""
+    manifests = {}
+    unlisted = []
+    for path in paths:
+        try:
+            with open(manifest_path(path), "r", encoding="utf-8") as f:
+                manifests[path] = json.load(f)
+        except FileNotFoundError:
+            unlisted.append(path)
+    return manifests, unlisted
+
+
+def read_records(paths):
+    """Записи шардов по студентам и множество меток шардов "K/N" из записей"""
+    records = {}
+    shards = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Недописанная строка прерванного запуска
+                    print(f"⚠️ {path}:{number}: повреждённая запись пропущена", file=sys.stderr)
+                    continue
+                if "shard" in record:
+                    shards.add(record["shard"])
+                records[record["student"]] = record
+    return records, shards
+
+
+def unfinished_students(manifests, records):
+    """Студенты из манифестов, у которых нет записи"""
+    return sorted({student for manifest in manifests.values()
+                   for student in manifest["students"]} - set(records))
+
+
+def missing_shards(shards):
+    """Номера шардов, которых нет среди меток. ValueError, если N различаются"""
+    counts = {int(label.split("/")[1]) for label in shards}
+    if len(counts) > 1:
+        raise ValueError(f"Шарды разбиения на разное число частей: {sorted(shards)}")
+    if not counts:
+        return []
+    count = counts.pop()
+    present = {int(label.split("/")[0]) for label in shards}
+    return [index for index in range(count) if index not in present]
+
+
+def write_student(directory, config, record):
+    """results/{task_id}.json и {task_id}_aggregated.txt одного студента"""
+    os.makedirs(directory, exist_ok=True)
+    all_results = load_results(config, record["results"], results_dir=None)
+    for task in config["tasks"]:
+        task_id = task["id"]
+        write_result(task_id, all_results[task_id], os.path.join(directory, "results"))
+        encoded = encode_result_for_classroom(make_aggregated(task, all_results[task_id]))
+        with open(os.path.join(directory, f"{task_id}_aggregated.txt"), "w") as f:
+            f.write(f"AGGREGATED_RESULT={encoded}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Слияние выводов шардов grade_batch.py")
+    parser.add_argument("shards", nargs="+", help="JSONL-выводы grade_batch.py")
+    parser.add_argument("--config", default=".github/tasks.json")
+    parser.add_argument("--output", "-o", default="-",
+                        help="Общий JSONL (по умолчанию stdout)")
+    parser.add_argument("--results-dir", metavar="DIR",
+                        help="Записать results/ и *_aggregated.txt каждого студента в DIR/<student>")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    records, labels = read_records(args.shards)
+    manifests, unlisted = read_manifests(args.shards)
+    shards = {manifest["shard"] for manifest in manifests.values()}
+    if labels and unlisted:
+        print(f"⚠️ Нет манифеста: {', '.join(unlisted)} — полнота шардов не проверяется",
+              file=sys.stderr)
+    try:
+        missing = missing_shards(shards)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    if missing:
+        print(f"⚠️ Не переданы шарды: {', '.join(map(str, missing))}", file=sys.stderr)
+    unfinished = unfinished_students(manifests, records)
+    if unfinished:
+        print(f"⚠️ Шарды не завершены, нет записей: {len(unfinished)} "
+              f"({', '.join(unfinished[:10])}{', …' if len(unfinished) > 10 else ''})",
+              file=sys.stderr)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    errors = 0
+    try:
+        for student in sorted(records):
+            record = records[student]
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if "error" in record:
+                errors += 1
+                print(f"❌ {student}: {record['error']}", file=sys.stderr)
+            elif args.results_dir:
+                write_student(os.path.join(args.results_dir, student), config, record)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"✅ Объединено студентов: {len(records)} (шардов: {len(shards | labels) or 1}, "
+          f"с ошибками: {errors})", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# tools/output_diff.py
+"""Компактный построчный diff вывода программы с ожидаемым.
+
+difflib на больших выводах квадратичен, поэтому выравнивание здесь
+линейное: общие начало и конец отрезаются, а в середине якорями служат
+строки, которые встречаются ровно один раз и в ожидаемом выводе, и в
+выводе программы (как в patience diff, но якоря берутся жадно, без
+поиска наибольшей возрастающей подпоследовательности). От каждого якоря
+совпадение продлевается в обе стороны, всё между совпадениями считается
+заменой. Если размеры различающихся частей отличаются больше чем в
+MAX_SIZE_RATIO раз, выравнивание пропускается — вся середина становится
+одной заменой.
+
+В отчёт попадают первые MAX_HUNKS фрагментов с CONTEXT строками
+контекста; длинные строки и фрагменты обрезаются. Формат — unified diff
+без заголовков файлов:
+
+    @@ -3,2 +3,2 @@
+     общая строка
+    -ожидалось
+    +получено
+"""
+CONTEXT = 2
+MAX_HUNKS = 3
+# Сколько строк каждой стороны замены показывать
+MAX_CHANGE_LINES = 10
+MAX_LINE = 120
+MAX_SIZE_RATIO = 10
+
+
+def _tag(e1, e2, a1, a2):
+    if e1 == e2:
+        return "insert"
+    if a1 == a2:
+        return "delete"
+    return "replace"
+
+
+def _anchors(expected, actual, e_lo, e_hi, a_lo, a_hi):
+    """Пары (i, j) уникальных в обеих частях строк, возрастающие по i и j"""
+    seen = {}   # строка -> [число в expected, число в actual, позиция в actual]
+    for i in range(e_lo, e_hi):
+        entry = seen.setdefault(expected[i], [0, 0, 0])
+        entry[0] += 1
+    for j in range(a_lo, a_hi):
+        entry = seen.get(actual[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[2] = j
+    anchors = []
+    last = a_lo - 1
+    for i in range(e_lo, e_hi):
+        count_e, count_a, j = seen[expected[i]]
+        if count_e == 1 and count_a == 1 and j > last:
+            anchors.append((i, j))
+            last = j
+    return anchors
+
+
+def opcodes(expected, actual):
+    """Операции как у difflib.SequenceMatcher.get_opcodes, за линейное время.
+
+    Возвращает (opcodes, aligned): aligned=False, если выравнивание
+    середины пропущено из-за слишком разных размеров.
+    """
+    n, m = len(expected), len(actual)
+    lo = 0
+    while lo < n and lo < m and expected[lo] == actual[lo]:
+        lo += 1
+    e_hi, a_hi = n, m
+    while e_hi > lo and a_hi > lo and expected[e_hi - 1] == actual[a_hi - 1]:
+        e_hi -= 1
+        a_hi -= 1
+
+    ops = [("equal", 0, lo, 0, lo)] if lo else []
+    small, large = sorted((e_hi - lo, a_hi - lo))
+    aligned = large <= MAX_SIZE_RATIO * max(1, small)
+    anchors = _anchors(expected, actual, lo, e_hi, lo, a_hi) if aligned and small else []
+
+    i = j = lo
+    for ai, aj in anchors:
+        if ai < i or aj < j:
+            continue    # уже поглощён продлением предыдущего якоря
+        bi, bj = ai, aj
+        while bi > i and bj > j and expected[bi - 1] == actual[bj - 1]:
+            bi -= 1
+            bj -= 1
+        if bi > i or bj > j:
+            ops.append((_tag(i, bi, j, bj), i, bi, j, bj))
+        ei, ej = ai + 1, aj + 1
+        while ei < e_hi and ej < a_hi and expected[ei] == actual[ej]:
+            ei += 1
+            ej += 1
+        ops.append(("equal", bi, ei, bj, ej))
+        i, j = ei, ej
+    if i < e_hi or j < a_hi:
+        ops.append((_tag(i, e_hi, j, a_hi), i, e_hi, j, a_hi))
+    if e_hi < n:
+        ops.append(("equal", e_hi, n, a_hi, m))
+    return ops, aligned
+
+
+def _clip(line):
+    return line if len(line) <= MAX_LINE else line[:MAX_LINE] + "…"
+
+
+def _side(prefix, lines, start, end):
+    shown = [prefix + _clip(line) for line in lines[start:min(end, start + MAX_CHANGE_LINES)]]
+    if end - start > MAX_CHANGE_LINES:
+        shown.append(f"{prefix}… ещё {end - start - MAX_CHANGE_LINES} строк")
+    return shown
+
+
+def _range(start, length):
+    # Как в unified diff: пустой диапазон указывает на строку перед ним
+    if length == 1:
+        return f"{start + 1}"
+    return f"{start + 1 if length else start},{length}"
+
+
+def _hunks(ops):
+    """Группирует изменения, между которыми не больше 2*CONTEXT общих строк"""
+    groups = []
+    for op in ops:
+        if op[0] == "equal":
+            continue
+        if groups and op[1] - groups[-1][-1][2] <= 2 * CONTEXT:
+            groups[-1].append(op)
+        else:
+            groups.append([op])
+    return groups
+
+
+def line_diff(expected, output, partial=False, max_hunks=MAX_HUNKS):
+    """Компактный diff ожидаемого вывода с выводом программы или None.
+
+    partial=True — программа остановлена на первом расхождении, и её
+    вывод неполный: сравнивается только столько строк ожидаемого вывода,
+    сколько успела вывести программа.
+    """
+    expected_lines = expected.splitlines()
+    actual = output.splitlines()
+    truncated = partial and len(expected_lines) > len(actual)
+    if truncated:
+        expected_lines = expected_lines[:len(actual)]
+    ops, aligned = opcodes(expected_lines, actual)
+    groups = _hunks(ops)
+    if not groups:
+        return None
+
+    lines = []
+    if not aligned:
+        lines.append(f"… размеры сильно различаются (ожидалось строк: {len(expected_lines)}, "
+                     f"получено: {len(actual)}) — выравнивание пропущено")
+    for group in groups[:max_hunks]:
+        e_start = max(0, group[0][1] - CONTEXT)
+        a_start = max(0, group[0][3] - CONTEXT)
+        e_end = min(len(expected_lines), group[-1][2] + CONTEXT)
+        a_end = min(len(actual), group[-1][4] + CONTEXT)
+        lines.append(f"@@ -{_range(e_start, e_end - e_start)} "
+                     f"+{_range(a_start, a_end - a_start)} @@")
+        position = e_start
+        for _, e1, e2, a1, a2 in group:
+            lines.extend(" " + _clip(line) for line in expected_lines[position:e1])
+            lines.extend(_side("-", expected_lines, e1, e2))
+            lines.extend(_side("+", actual, a1, a2))
+            position = e2
+        lines.extend(" " + _clip(line) for line in expected_lines[position:e_end])
+    if len(groups) > max_hunks:
+        lines.append(f"… ещё фрагментов с расхождениями: {len(groups) - max_hunks}")
+    if truncated:
+        lines.append("… программа остановлена на первом расхождении, дальше вывод не сравнивался")
+    return "\n".join(lines)
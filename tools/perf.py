@@ -0,0 +1,173 @@
+# tools/perf.py
+"""Тесты производительности (comparison_method: "perf").
+
+Пример теста в tasks.json:
+
+    {
+      "name": "Производительность",
+      "comparison_method": "perf",
+      "generator": "text",
+      "base_size": 100000,
+      "scale": 2,
+      "steps": 4,
+      "repeat": 3,
+      "time_budget": 0.5,
+      "memory_budget_mb": 64,
+      "max_complexity": "n",
+      "max_score": 10
+    }
+
+Программа запускается на входах размера base_size * scale**i (или на
+явном списке "sizes"), каждый размер — repeat раз, берётся медиана
+времени CPU. Рост оценивается по разностям соседних замеров: для
+t(n) = a + b * n**k при геометрическом росте размеров отношение соседних
+разностей равно scale**k, поэтому постоянная часть (старт интерпретатора)
+не влияет на оценку k.
+
+Баллы делятся поровну между тремя бюджетами: время CPU на наибольшем
+размере, пиковая память и допустимый рост. Если программа упала или не
+уложилась в таймаут, тест не пройден.
+"""
+import importlib
+import math
+import random
+import statistics
+
+from utils import METRIC_KEYS
+
+# Разности времени меньше этого порога считаются шумом (секунды CPU)
+NOISE_FLOOR = 0.002
+
+COMPLEXITY_EXPONENTS = {"1": 0, "log n": 0, "n": 1, "n log n": 1, "n^2": 2, "n^3": 3}
+
+
+def _text(n, rng):
+    return "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=n))
+
+
+def _numbers(n, rng):
+    return "\n".join(f"{rng.uniform(0, 1000):.2f}" for _ in range(n))
+
+
+def _lines(n, rng):
+    return "\n".join(_text(8, rng) for _ in range(n))
+
+
+GENERATORS = {
+    "text": _text,
+    "numbers": _numbers,
+    "lines": _lines,
+}
+
+
+def get_generator(name):
+    """Встроенный генератор или "module:function" из каталога tools"""
+    if name in GENERATORS:
+        return GENERATORS[name]
+    module_name, _, function = name.partition(":")
+    return getattr(importlib.import_module(module_name), function)
+
+
+def input_sizes(test):
+    if "sizes" in test:
+        return list(test["sizes"])
+    base = test.get("base_size", 1000)
+    scale = test.get("scale", 2)
+    return [base * scale ** i for i in range(test.get("steps", 4))]
+
+
+def growth_exponent(sizes, times):
+    """Оценка показателя k в t(n) = a + b * n**k по соседним разностям"""
+    if len(sizes) < 3 or times[-1] - times[0] < NOISE_FLOOR:
+        return 0.0
+    estimates = []
+    for i in range(len(sizes) - 2):
+        first = times[i + 1] - times[i]
+        second = times[i + 2] - times[i + 1]
+        if first <= NOISE_FLOOR / 2 or second <= 0:
+            continue
+        # Отношение шагов по n для неравномерных размеров
+        step_ratio = (sizes[i + 2] - sizes[i + 1]) / (sizes[i + 1] - sizes[i])
+        ratio = sizes[i + 1] / sizes[i]
+        estimates.append(math.log(second / first / step_ratio, ratio) + 1)
+    if not estimates:
+        return 0.0
+    return max(0.0, statistics.median(estimates))
+
+
+def complexity_label(exponent):
+    if exponent < 0.5:
+        return "O(1)"
+    if exponent < 1.5:
+        return "O(n)"
+    if exponent < 2.5:
+        return "O(n²)"
+    return f"O(n^{exponent:.1f})"
+
+
+def run_perf_test(runner, task_file, test, root=".", jobs=1):
+    """Запускает perf-тест и возвращает запись для results JSON.
+
+    jobs не используется: замеры идут последовательно, чтобы не мешать друг другу.
+    """
+    sizes = input_sizes(test)
+    repeat = max(1, test.get("repeat", 3))
+    timeout = test.get("timeout", 5)
+    generate = get_generator(test.get("generator", "text"))
+    # Повторные замеры должны реально выполняться, а не браться из журнала
+    backend = getattr(runner, "runner", runner)
+
+    medians = []
+    peak_rss = 0
+    last = None
+    for n in sizes:
+        stdin = generate(n, random.Random(n))
+        runs = []
+        for _ in range(repeat):
+            result = backend.run(task_file, stdin, timeout=timeout, cwd=root)
+            if result["timed_out"] or result["output_limited"] or result["returncode"] != 0:
+                if result["timed_out"]:
+                    reason = "TIMEOUT"
+                elif result["output_limited"]:
+                    reason = "OUTPUT_LIMIT"
+                else:
+                    reason = f"ERROR: код завершения {result['returncode']}"
+                return {
+                    "name": test["name"],
+                    "status": "fail",
+                    "score": 0,
+                    "output": f"{reason} при n={n}",
+                    **{key: result[key] for key in METRIC_KEYS}
+                }
+            runs.append(result)
+        runs.sort(key=lambda r: r["cpu_time"])
+        last = runs[len(runs) // 2]
+        medians.append(last["cpu_time"])
+        peak_rss = max(peak_rss, max(r["max_rss_kb"] for r in runs))
+
+    exponent = growth_exponent(sizes, medians)
+    allowed = COMPLEXITY_EXPONENTS.get(test.get("max_complexity", "n"), 1)
+    checks = {
+        "время": medians[-1] <= test.get("time_budget", float("inf")),
+        "память": peak_rss / 1024 <= test.get("memory_budget_mb", float("inf")),
+        "рост": exponent <= allowed + 0.5,
+    }
+    passed = sum(checks.values())
+    score = test["max_score"] * passed // len(checks)
+
+    verdicts = ", ".join(f"{name} {'✅' if ok else '❌'}" for name, ok in checks.items())
+    return {
+        "name": test["name"],
+        "status": "pass" if passed == len(checks) else "fail",
+        "score": score,
+        "output": (f"{complexity_label(exponent)}, {medians[-1]:.3f} с CPU при n={sizes[-1]}, "
+                   f"{peak_rss / 1024:.1f} МБ; {verdicts}"),
+        "perf": {
+            "sizes": sizes,
+            "cpu_times": [round(t, 4) for t in medians],
+            "exponent": round(exponent, 2)
+        },
+        "wall_time": last["wall_time"],
+        "cpu_time": last["cpu_time"],
+        "max_rss_kb": peak_rss
+    }
@@ -0,0 +1,223 @@
+# tools/refactor_rules.py
+"""Декларативные правила проверки рефакторинга.
+
+Правила задаются в .github/tasks.json в поле "rules" задачи *_refactor:
+
+    {"rule": "name_absent", "name": "x"}            — имя не должно встречаться
+    {"rule": "name_present", "name": "user_id"}     — имя должно встречаться
+    {"rule": "function_exists", "name": "circle_area"}
+    {"rule": "pattern_count_max", "pattern": "3.14 * _ ** 2", "max": 1}
+    {"rule": "output", "input": "hi", "expected_output": "hihi"}
+
+В шаблоне выражения `_` обозначает любое подвыражение. У каждого правила
+может быть своё сообщение "message" с подстановками {name}, {count}, {max}
+и т. п.
+
+Файл разбирается один раз, за один обход дерева строится индекс узлов по
+типу, и все AST-правила отвечают по этому индексу. Правила проверяются по
+порядку, результатом является первое нарушенное.
+"""
+import ast
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from output_diff import line_diff
+from result_cache import file_digest
+from runner import run_program
+
+CONFIG_PATH = Path(__file__).parent.parent / ".github" / "tasks.json"
+
+DEFAULT_MESSAGES = {
+    "name_absent": "Имя '{name}' всё ещё используется",
+    "name_present": "Имя '{name}' не найдено",
+    "function_exists": "Функция '{name}' не найдена",
+    "pattern_count_max": "Выражение '{pattern}' встречается {count} раз(а) — должно быть ≤ {max}",
+}
+
+_parsed = {}
+_parsed_lock = threading.Lock()
+MAX_PARSED = 64
+
+
+class NodeIndex:
+    """Узлы дерева, сгруппированные по типу, — строится за один обход"""
+
+    def __init__(self, tree):
+        self.by_type = defaultdict(list)
+        for node in ast.walk(tree):
+            self.by_type[type(node)].append(node)
+
+    def nodes(self, node_type):
+        return self.by_type.get(node_type, [])
+
+    def names(self):
+        return {node.id for node in self.nodes(ast.Name)}
+
+
+def parse_file(path):
+    """Разбирает файл и строит индекс; результат кэшируется по содержимому"""
+    key = (os.path.abspath(path), file_digest(path))
+    with _parsed_lock:
+        index = _parsed.get(key)
+    if index is None:
+        with open(path, "r", encoding="utf-8") as f:
+            index = NodeIndex(ast.parse(f.read()))
+        with _parsed_lock:
+            if len(_parsed) >= MAX_PARSED:
+                _parsed.clear()
+            _parsed[key] = index
+    return index
+
+
+def _matches(pattern, node):
+    """Сравнивает узел с шаблоном; Name('_') в шаблоне совпадает с чем угодно"""
+    if isinstance(pattern, ast.Name) and pattern.id == "_":
+        return isinstance(node, ast.expr)
+    if type(pattern) is not type(node):
+        return False
+    if isinstance(pattern, ast.Constant):
+        return type(pattern.value) is type(node.value) and pattern.value == node.value
+    for field, value in ast.iter_fields(pattern):
+        if field == "ctx":
+            continue
+        other = getattr(node, field, None)
+        if isinstance(value, list):
+            if not isinstance(other, list) or len(value) != len(other):
+                return False
+            if not all(_matches(p, n) for p, n in zip(value, other)):
+                return False
+        elif isinstance(value, ast.AST):
+            if not isinstance(other, ast.AST) or not _matches(value, other):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+def count_pattern(index, pattern):
+    pattern_node = ast.parse(pattern, mode="eval").body
+    return sum(_matches(pattern_node, node) for node in index.nodes(type(pattern_node)))
+
+
+def _failure(rule, **values):
+    template = rule.get("message", DEFAULT_MESSAGES.get(rule["rule"], "Правило {rule} нарушено"))
+    return template.format(**{**rule, **values})
+
+
+def check_ast_rule(rule, index):
+    """Возвращает сообщение о нарушении или None"""
+    kind = rule["rule"]
+    if kind == "name_absent":
+        if rule["name"] in index.names():
+            return _failure(rule)
+    elif kind == "name_present":
+        if rule["name"] not in index.names():
+            return _failure(rule)
+    elif kind == "function_exists":
+        functions = index.nodes(ast.FunctionDef) + index.nodes(ast.AsyncFunctionDef)
+        if not any(node.name == rule["name"] for node in functions):
+            return _failure(rule)
+    elif kind == "pattern_count_max":
+        count = count_pattern(index, rule["pattern"])
+        if count > rule["max"]:
+            return _failure(rule, count=count)
+    else:
+        raise ValueError(f"Неизвестное правило: {kind}")
+    return None
+
+
+class FailureMessage(str):
+    """Сообщение о нарушении правила с приложенным diff вывода.
+
+    Ведёт себя как обычная строка, поэтому плагины проверки возвращают
+    его как есть; run_all_tests сохраняет diff в results JSON.
+    """
+
+    def __new__(cls, text, diff=None):
+        message = super().__new__(cls, text)
+        message.diff = diff
+        return message
+
+
+def check_output_rule(rule, task_file, root=".", runner=None):
+    timeout = rule.get("timeout", 3)
+    if runner is None:
+        result = run_program(os.path.join(root, task_file), rule["input"], timeout)
+    else:
+        result = runner.run(task_file, rule["input"], timeout, cwd=root)
+    if result["timed_out"]:
+        return "Программа не завершилась за отведённое время"
+    if result["output_limited"]:
+        return "Программа вывела слишком много данных"
+    if result["returncode"] != 0:
+        return "Программа завершилась с ошибкой"
+    output = result["stdout"].strip()
+    expected = rule["expected_output"]
+    if output != expected:
+        template = rule.get("message", "Неверный вывод: ожидалось '{expected_output}', получено '{output}'")
+        return FailureMessage(template.format(**rule, output=output), line_diff(expected, output))
+    return None
+
+
+def check_rules(task_file, rules, root=".", runner=None):
+    """Проверяет файл задачи по списку правил. Возвращает (ok, сообщение)
+
+    task_file задаётся относительно каталога сдачи root. Программа
+    запускается через runner (например, ExecutionLedger), а без него —
+    через run_program.
+    """
+    if not os.path.exists(os.path.join(root, task_file)):
+        return False, f"Файл {task_file} не найден"
+
+    try:
+        index = parse_file(os.path.join(root, task_file))
+    except SyntaxError as e:
+        return False, f"Синтаксическая ошибка: {e}"
+
+    # Сначала все правила по структуре кода, затем запуск программы
+    for rule in rules:
+        if rule["rule"] != "output":
+            message = check_ast_rule(rule, index)
+            if message:
+                return False, message
+
+    for rule in rules:
+        if rule["rule"] == "output":
+            try:
+                message = check_output_rule(rule, task_file, root, runner)
+            except Exception as e:
+                message = f"Ошибка при запуске программы: {e}"
+            if message:
+                return False, message
+
+    return True, "OK"
+
+
+def load_task(task_id, config_path=CONFIG_PATH):
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    for task in config["tasks"]:
+        if task["id"] == task_id:
+            return task
+    raise KeyError(f"Задача {task_id} не найдена в {config_path}")
+
+
+def check_task(task_id, root=".", runner=None, config_path=CONFIG_PATH, task=None):
+    """Проверяет задачу рефакторинга по её правилам.
+
+    task — описание задачи из уже загруженного конфига (его передаёт
+    грейдер); без него задача читается из config_path.
+    """
+    if task is None:
+        task = load_task(task_id, config_path)
+    return check_rules(task["file"], task.get("rules", []), root, runner)
+
+
+def format_report(label, ok, message, success):
+    """Строка отчёта проверки, например «✅ task_01: ...»"""
+    if ok:
+        return f"✅ {label}: {success}"
+    return f"❌ {label}: {message}"
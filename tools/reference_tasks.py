@@ -0,0 +1,49 @@
+# tools/reference_tasks.py
+"""Эталонные решения и генераторы вводов для дифференциальных тестов.
+
+Эталон получает весь пакет вводов и возвращает список ожидаемых выводов.
+Если установлен NumPy, пакет обрабатывается векторно, иначе — поэлементно
+через map; результат одинаковый.
+"""
+import string
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Без пробельных символов: вывод сравнивается после .strip()
+TEXT_ALPHABET = string.ascii_letters + string.digits + "_-.,!?"
+
+
+def task_01_inputs(count, rng):
+    return ["".join(rng.choices(TEXT_ALPHABET, k=rng.randint(1, 20))) for _ in range(count)]
+
+
+def task_01_reference(inputs):
+    if np is not None:
+        return np.char.multiply(np.array(inputs, dtype=str), 2).tolist()
+    return list(map(lambda x: x * 2, inputs))
+
+
+def _radius(rng):
+    # Целые, с одним и с несколькими знаками после точки
+    kind = rng.randrange(3)
+    if kind == 0:
+        return str(rng.randint(0, 1000))
+    if kind == 1:
+        return f"{rng.uniform(0, 100):.1f}"
+    return f"{rng.uniform(0, 100):.{rng.randint(2, 6)}f}"
+
+
+def task_02_inputs(count, rng):
+    return [f"{_radius(rng)}\n{_radius(rng)}" for _ in range(count)]
+
+
+def task_02_reference(inputs):
+    if np is not None:
+        radii = np.array(" ".join(inputs).split(), dtype=np.float64).reshape(-1, 2)
+        areas = np.char.mod("%.2f", 3.14 * radii ** 2)
+        return np.char.add(np.char.add(areas[:, 0], "\n"), areas[:, 1]).tolist()
+    return list(map(lambda stdin: "\n".join(f"{3.14 * float(r) ** 2:.2f}" for r in stdin.split()),
+                    inputs))
@@ -2,9 +2,15 @@
 import json
 import sys
 import os
+import re
 import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import load_results, resource_totals, slowest_tests
+from gradebook import Gradebook, default_student
+import tracing
+
 def extract_and_output_env():
     config_path = ".github/tasks.json"
     if not os.path.exists(config_path):
@@ -31,28 +37,21 @@ def extract_and_output_env():
                     encoded = content.split("AGGREGATED_RESULT=", 1)[1].strip()
             f.write(f"{task_id}_aggregated={encoded}\n")
 
-def generate_summary():
-    config_path = ".github/tasks.json"
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+def code_fence(text):
+    """Ограничитель блока кода длиннее любой серии ` в тексте (не меньше трёх)"""
+    longest = max((len(run) for run in re.findall(r"`+", text)), default=0)
+    return "`" * max(3, longest + 1)
 
+def build_summary(config, all_results):
+    """Текст итогового отчёта (Markdown) по результатам всех задач"""
     total_score = 0
     max_total = 0
     task_scores = {}
 
     for task in config["tasks"]:
         task_id = task["id"]
-        max_score = task["max_score"]
-        max_total += max_score
-
-        json_path = f"results/{task_id}.json"
-        if os.path.exists(json_path):
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            score = sum(t.get("score", 0) for t in data["tests"])
-        else:
-            score = 0
-
+        max_total += task["max_score"]
+        score = sum(t.get("score", 0) for t in all_results[task_id]["tests"])
         task_scores[task_id] = score
         total_score += score
 
@@ -75,6 +74,35 @@ def generate_summary():
     summary.append(f"| **ВСЕГО** | **{total_score}** | **{max_total}** | **{percentage}%** |")
     summary.append("")
 
+    measured = {tid: resource_totals(data) for tid, data in all_results.items()}
+    measured = {tid: totals for tid, totals in measured.items() if totals["measured"]}
+    if measured:
+        summary.append("### ⏱️ Ресурсы\n")
+        summary.append("| Задание | Время | CPU | Пиковая память |")
+        summary.append("|---------|-------|-----|----------------|")
+        for tid, totals in measured.items():
+            summary.append(f"| {tid} | {totals['wall_time']:.3f} с | {totals['cpu_time']:.3f} с | "
+                           f"{totals['max_rss_kb'] / 1024:.1f} МБ |")
+        summary.append("")
+        summary.append("**🐢 Самые долгие тесты:**\n")
+        for tid, test in slowest_tests(all_results):
+            summary.append(f"- {tid} / {test['name']}: {test['wall_time']:.3f} с")
+        summary.append("")
+
+    diffs = [(task["id"], test) for task in config["tasks"]
+             for test in all_results[task["id"]]["tests"] if test.get("diff")]
+    if diffs:
+        summary.append("### 🔎 Расхождения вывода\n")
+        for tid, test in diffs:
+            reason = f" — {test['reason']}" if test.get("reason") else ""
+            summary.append(f"**{tid} / {test['name']}**{reason}\n")
+            # Вывод студента может содержать ``` и закрыть блок раньше времени
+            fence = code_fence(test["diff"])
+            summary.append(f"{fence}diff")
+            summary.append(test["diff"])
+            summary.append(fence)
+            summary.append("")
+
     summary.append("### 📁 Найденные файлы:\n")
     for task in config["tasks"]:
         f = task["file"]
@@ -94,26 +122,58 @@ def generate_summary():
     summary.append(f"**GitHub Classroom: {total_score}/{max_total} баллов**")
     summary.append("")
     summary.append("*Автоматическая проверка завершена* • $(date)")
+    return "\n".join(summary)
 
+def write_summary(text):
     # Запись в GITHUB_STEP_SUMMARY
     summary_file = os.environ.get("GITHUB_STEP_SUMMARY", "/dev/stdout")
     with open(summary_file, "a") as f:
-        f.write("\n".join(summary))
+        f.write(text)
+
+def generate_summary(gradebook=None, student=None):
+    config_path = ".github/tasks.json"
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    if gradebook:
+        # Последний прогон студента из журнала оценок вместо results/
+        book = Gradebook(gradebook)
+        try:
+            student = student or default_student()
+            stored = book.latest_results(student)
+        finally:
+            book.close()
+        if not stored:
+            print(f"❌ В журнале {gradebook} нет прогонов студента {student}", file=sys.stderr)
+            sys.exit(1)
+        all_results = load_results(config, stored, results_dir=None)
+    else:
+        with tracing.span("load_results"):
+            all_results = load_results(config)
+    with tracing.span("build_summary"):
+        text = build_summary(config, all_results)
+    with tracing.span("write_summary"):
+        write_summary(text)
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--extract", action="store_true")
     parser.add_argument("--output-env", action="store_true")
     parser.add_argument("--generate-summary", action="store_true")
+    parser.add_argument("--gradebook", metavar="DB",
+                        help="Читать результаты из журнала оценок SQLite, а не из results/")
+    parser.add_argument("--student", default=None)
+    tracing.add_arguments(parser)
 
     args = parser.parse_args()
 
-    if args.extract and args.output_env:
-        extract_and_output_env()
-    elif args.generate_summary:
-        generate_summary()
-    else:
-        parser.print_help()
+    with tracing.session("report_summary", args.trace, args.profile):
+        if args.extract and args.output_env:
+            extract_and_output_env()
+        elif args.generate_summary:
+            generate_summary(args.gradebook, args.student)
+        else:
+            parser.print_help()
 
 if __name__ == "__main__":
     main()
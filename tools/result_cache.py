@@ -0,0 +1,136 @@
+# tools/result_cache.py
+"""Дисковый кэш результатов проверки с адресацией по содержимому.
+
+Каждая запись — отдельный JSON-файл <ключ>.json в каталоге кэша. Ключ —
+SHA-256 от всего, что влияет на результат. Время изменения файла служит
+отметкой последнего использования: при превышении лимита размера удаляются
+самые давно использованные записи (LRU).
+"""
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = ".grader_cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Входит в каждый ключ: увеличивается, когда меняется формат записей или
+# то, как проверка получает результат, — старые записи перестают находиться
+CACHE_VERSION = 2
+
+_VERSION_SCRIPT = "import platform, sys; print(platform.python_implementation(), sys.version)"
+
+# (путь, mtime) интерпретатора -> его версия
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def interpreter_version(executable=None):
+    """Реализация и версия интерпретатора, выполняющего программы.
+
+    Без аргумента — текущий интерпретатор. Внешний executable (например,
+    python3 из PATH) опрашивается один раз, пока не изменится его файл.
+    """
+    if executable is None or executable == sys.executable:
+        return f"{platform.python_implementation()} {sys.version}"
+    path = os.path.realpath(shutil.which(executable) or executable)
+    try:
+        key = (path, os.stat(path).st_mtime_ns)
+    except OSError:
+        return path
+    with _versions_lock:
+        version = _versions.get(key)
+    if version is None:
+        try:
+            result = subprocess.run([path, "-c", _VERSION_SCRIPT], capture_output=True,
+                                    text=True, timeout=30)
+            version = result.stdout.strip() or path
+        except (OSError, subprocess.SubprocessError):
+            return path
+        with _versions_lock:
+            _versions[key] = version
+    return version
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, namespace=""):
+        self.directory = Path(directory) / namespace if namespace else Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = sum(p.stat().st_size for p in self.directory.glob("*.json"))
+
+    @staticmethod
+    def make_key(*parts):
+        """Ключ из произвольных JSON-сериализуемых частей и CACHE_VERSION"""
+        payload = json.dumps([CACHE_VERSION, *parts], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        path = self.directory / f"{key}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # отметка использования для LRU
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        path = self.directory / f"{key}.json"
+        # Запись через временный файл, чтобы параллельные читатели
+        # никогда не видели половину записи
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи до 3/4 лимита"""
+        entries = []
+        for p in self.directory.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 3 // 4
+        for _, size, p in entries:
+            if self._size <= target:
+                break
+            try:
+                p.unlink()
+                self._size -= size
+            except OSError:
+                pass
+
+    def stats_line(self):
+        return f"💾 Кэш результатов: {self.hits} попаданий, {self.misses} промахов"
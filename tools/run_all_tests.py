@@ -2,161 +2,403 @@
 import json
 import sys
 import os
-import subprocess
 import argparse
+import importlib.util
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 # Путь к директории tools, чтобы можно было импортировать utils
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import make_task_result_stub
+from utils import METRIC_KEYS, make_task_result_stub
+from runner import (DEFAULT_OUTPUT_LIMIT, RUNNERS, ExecutionLedger, install_signal_handlers,
+                    make_runner)
+from refactor_rules import format_report
+from compare import DEFAULT_ABS_TOL, DEFAULT_REL_TOL, find_mismatch, numeric_mismatch
+from output_diff import line_diff
+import incremental
+import tracing
+import watch
+from perf import run_perf_test
+from differential import run_differential_test
+from result_cache import (DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache,
+                          file_digest, interpreter_version)
 
-def run_behavioral_test(task_config):
-    """Запускает поведенческие тесты (как раньше)"""
-    task_id = task_config["id"]
-    task_file = task_config["file"]
-    results_dir = Path("results")
-    results_dir.mkdir(exist_ok=True)
-    result_path = results_dir / f"{task_id}.json"
+# Загруженные плагины проверки рефакторинга: (путь, хэш) -> модуль
+_checkers = {}
+_checkers_lock = threading.Lock()
 
-    if not os.path.exists(task_file):
-        print(f"⚠️ {task_file} не найден — создаём заглушку")
-        stub = make_task_result_stub(task_config)
-        with open(result_path, "w", encoding="utf-8") as f:
-            json.dump(stub, f, ensure_ascii=False, indent=2)
-        return
+# Тесты, которые запускают программу много раз и сами выставляют баллы
+COMPOSITE_TESTS = {
+    "perf": run_perf_test,
+    "differential": run_differential_test,
+}
 
-    tests = []
-    total_score = 0
+def run_single_test(runner, task_file, test, root=".", jobs=1):
+    """Запускает один поведенческий тест и возвращает запись для results JSON.
 
-    for test in task_config["tests"]:
+    jobs — сколько запусков одновременно может делать составной тест.
+    """
+    if test["comparison_method"] in COMPOSITE_TESTS:
         try:
-            result = subprocess.run(
-                ["python3", task_file],
-                input=test["input"],
-                text=True,
-                capture_output=True,
-                timeout=5
-            )
-            output = result.stdout.strip()
-            expected = test["expected_output"]
-            method = test["comparison_method"]
-
-            if method == "exact":
-                passed = output == expected
-            elif method == "contains":
-                passed = expected in output
-            else:
-                passed = False
-
-            score = test["max_score"] if passed else 0
-            total_score += score
-
-            tests.append({
+            return COMPOSITE_TESTS[test["comparison_method"]](runner, task_file, test, root, jobs)
+        except Exception as e:
+            return {
                 "name": test["name"],
-                "status": "pass" if passed else "fail",
-                "score": score,
-                "output": output[:200]  # Обрезаем длинный вывод
-            })
+                "status": "fail",
+                "score": 0,
+                "output": f"ERROR: {str(e)}"
+            }
 
-        except subprocess.TimeoutExpired:
-            tests.append({
+    try:
+        # Точное сравнение идёт прямо во время работы программы
+        expect = test["expected_output"] if test["comparison_method"] == "exact" else None
+        with tracing.span("run", file=task_file, test=test["name"]):
+            result = runner.run(task_file, test["input"], timeout=test.get("timeout", 5), cwd=root,
+                                expect=expect)
+        metrics = {key: result[key] for key in METRIC_KEYS}
+        if result["timed_out"]:
+            return {
                 "name": test["name"],
                 "status": "fail",
                 "score": 0,
-                "output": "TIMEOUT"
-            })
-        except Exception as e:
-            tests.append({
+                "output": "TIMEOUT",
+                **metrics
+            }
+        if result["output_limited"]:
+            return {
                 "name": test["name"],
                 "status": "fail",
                 "score": 0,
-                "output": f"ERROR: {str(e)}"
-            })
+                "output": "OUTPUT_LIMIT",
+                **metrics
+            }
+
+        output = result["stdout"].strip()
+        expected = test["expected_output"]
+        method = test["comparison_method"]
+        mismatch = None
+        reason = None
+
+        if method == "exact":
+            # Если программа остановлена досрочно, позиция уже известна
+            mismatch = result["mismatch"] or find_mismatch(expected, result["stdout"])
+            passed = mismatch is None
+        elif method == "numeric":
+            problem = numeric_mismatch(expected, result["stdout"],
+                                       test.get("abs_tol", DEFAULT_ABS_TOL),
+                                       test.get("rel_tol", DEFAULT_REL_TOL))
+            passed = problem is None
+            if problem:
+                reason, mismatch = problem
+        elif method == "contains":
+            passed = expected in output
+        else:
+            passed = False
+
+        score = test["max_score"] if passed else 0
+
+        entry = {
+            "name": test["name"],
+            "status": "pass" if passed else "fail",
+            "score": score,
+            "output": output[:200],  # Обрезаем длинный вывод
+            **metrics
+        }
+        if mismatch is not None:
+            entry["mismatch"] = {"line": mismatch[0], "column": mismatch[1]}
+        if reason:
+            entry["reason"] = reason
+        if not passed and method in ("exact", "numeric"):
+            # Вывод остановленной на расхождении программы неполный
+            diff = line_diff(expected, output, partial=result["mismatch"] is not None)
+            if diff:
+                entry["diff"] = diff
+        return entry
 
-    result_data = {
+    except Exception as e:
+        return {
+            "name": test["name"],
+            "status": "fail",
+            "score": 0,
+            "output": f"ERROR: {str(e)}"
+        }
+
+
+def run_cached_test(runner, task_file, test, root, cache, key, jobs=1):
+    """Как run_single_test, но сохраняет запись теста в кэш"""
+    entry = run_single_test(runner, task_file, test, root, jobs)
+    # Таймауты, ошибки запуска и замеры производительности зависят
+    # от нагрузки, превышение лимита вывода — от настроек прогона, а
+    # дифференциальные тесты — ещё и от кода эталона в tools/
+    if (entry["output"] not in ("TIMEOUT", "OUTPUT_LIMIT") and
+            not entry["output"].startswith("ERROR: ") and
+            test["comparison_method"] not in COMPOSITE_TESTS):
+        cache.put(key, entry)
+    return entry
+
+
+def make_task_result(max_score, tests):
+    """Собирает results/{task_id}.json из записей отдельных тестов"""
+    total_score = sum(t["score"] for t in tests)
+    return {
         "version": 1,
-        "status": "pass" if total_score == task_config["max_score"] else "fail",
-        "max_score": task_config["max_score"],
+        "status": "pass" if total_score == max_score else "fail",
+        "max_score": max_score,
         "tests": tests
     }
 
-    with open(result_path, "w", encoding="utf-8") as f:
-        json.dump(result_data, f, ensure_ascii=False, indent=2)
 
-def run_refactor_check(task_id: str, check_script: str, max_score: int):
-    """Запускает скрипт проверки рефакторинга и генерирует results/{task_id}.json"""
-    results_dir = Path("results")
+def write_result(task_id, result_data, results_dir="results"):
+    results_dir = Path(results_dir)
     results_dir.mkdir(exist_ok=True)
-    result_path = results_dir / f"{task_id}.json"
+    with tracing.span("write_result", task=task_id):
+        with open(results_dir / f"{task_id}.json", "w", encoding="utf-8") as f:
+            json.dump(result_data, f, ensure_ascii=False, indent=2)
+
+
+def run_behavioral_test(task_config, runner, executor, root=".", cache=None, jobs=1):
+    """Ставит поведенческие тесты задачи в пул executor.
+
+    Возвращает callable, который дожидается тестов и возвращает
+    содержимое results/{task_id}.json. Если передан cache, тесты с
+    неизменившимся файлом задачи и описанием теста не выполняются — их
+    записи берутся из кэша с полем "cached": true.
+    """
+    task_file = task_config["file"]
+    task_path = os.path.join(root, task_file)
+
+    if not os.path.exists(task_path):
+        def finish():
+            print(f"⚠️ {task_file} не найден — создаём заглушку")
+            return make_task_result_stub(task_config)
+        return finish
+
+    if cache is None:
+        futures = [executor.submit(run_single_test, runner, task_file, test, root, jobs)
+                   for test in task_config["tests"]]
+    else:
+        digest = file_digest(task_path)
+        # Результат зависит и от интерпретатора, который запускает программы,
+        # и от лимита вывода
+        version = interpreter_version(runner.executable)
+        futures = []
+        for test in task_config["tests"]:
+            key = ResultCache.make_key("behavioral", digest, test, version, runner.output_limit)
+            with tracing.span("cache.get", task=task_config["id"], test=test["name"]):
+                entry = cache.get(key)
+            if entry is None:
+                futures.append(executor.submit(run_cached_test, runner, task_file, test,
+                                               root, cache, key, jobs))
+            else:
+                futures.append(Future())
+                futures[-1].set_result({**entry, "cached": True})
+
+    def finish():
+        tests = [f.result() for f in futures]
+        return make_task_result(task_config["max_score"], tests)
+
+    return finish
+
+
+def load_checker(check_script):
+    """Загружает скрипт проверки рефакторинга как модуль-плагин.
+
+    Модуль загружается один раз на версию файла — в режиме --watch
+    изменённый скрипт подхватывается заново.
+    """
+    path = os.path.abspath(check_script)
+    key = (path, file_digest(path))
+    with _checkers_lock:
+        module = _checkers.get(key)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(Path(path).stem, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _checkers[key] = module
+    return module
 
+
+def run_refactor_plugin(task_config, runner, root="."):
+    """Вызывает check_task_XX() плагина проверки и возвращает запись теста.
+
+    Плагин получает task_config, поэтому правила берутся из того же
+    конфига, что и остальная проверка (--config, пакетный режим, сервер).
+    """
+    label = task_config["id"].removesuffix("_refactor")
+    max_score = task_config["max_score"]
     try:
-        result = subprocess.run(
-            ["python3", check_script],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        passed = result.returncode == 0
+        module = load_checker(task_config["checker"])
+        with tracing.span("refactor_check", task=task_config["id"]):
+            passed, message = getattr(module, f"check_{label}")(root=root, runner=runner,
+                                                                task=task_config)
         score = max_score if passed else 0
-        output = result.stdout.strip() or result.stderr.strip()
+        output = format_report(label, passed, message, module.SUCCESS_MESSAGE)
     except Exception as e:
         passed = False
         score = 0
+        message = None
         output = f"Ошибка при запуске проверки рефакторинга: {e}"
 
-    test_entry = {
+    entry = {
         "name": "Проверка рефакторинга",
         "status": "pass" if passed else "fail",
         "score": score,
         "output": output[:200]
     }
+    # Правило "output" прикладывает к сообщению diff вывода
+    diff = getattr(message, "diff", None)
+    if not passed and diff:
+        entry["diff"] = diff
+    return entry, output
 
-    result_data = {
-        "version": 1,
-        "status": "pass" if score == max_score else "fail",
-        "max_score": max_score,
-        "tests": [test_entry]
-    }
 
-    with open(result_path, "w", encoding="utf-8") as f:
-        json.dump(result_data, f, ensure_ascii=False, indent=2)
+def run_refactor_check(task_config, runner, executor, root="."):
+    """Ставит проверку рефакторинга из поля "checker" задачи в пул executor.
 
-    status = "✅" if passed else "❌"
-    print(f"{status} Рефакторинг {task_id}: {output}")
+    Проверка выполняется в процессе грейдера для каталога сдачи root. Как и
+    run_behavioral_test, возвращает callable, который дожидается проверки и
+    возвращает результат.
+    """
+    task_id = task_config["id"]
+    check_script = task_config["checker"]
+    if not os.path.exists(check_script):
+        def finish():
+            # Если скрипт не найден — создаём заглушку
+            print(f"⚠️ Скрипт {check_script} не найден — создан заглушка-результат")
+            return make_task_result_stub(task_config)
+        return finish
 
-def main():
-    config_path = ".github/tasks.json"
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = json.load(f)
+    future = executor.submit(run_refactor_plugin, task_config, runner, root)
 
-    # Запускаем обычные тесты для всех задач
+    def finish():
+        test_entry, output = future.result()
+        status = "✅" if test_entry["status"] == "pass" else "❌"
+        print(f"{status} Рефакторинг {task_id}: {output}")
+        return make_task_result(task_config["max_score"], [test_entry])
+
+    return finish
+
+
+def grade_submission(config, runner, executor, root=".", cache=None, only=None, jobs=1):
+    """Прогоняет все задачи одной сдачи из каталога root.
+
+    Задачи с полем "checker" — проверки рефакторинга, остальные —
+    поведенческие тесты. Если задано множество only, проверяются только
+    эти задачи. jobs — число потоков executor, его же получают составные
+    тесты. Возвращает словарь {task_id: содержимое
+    results/{task_id}.json} в порядке задач.
+    """
+    # Все пары (задача, тест) и проверки рефакторинга ставятся в общий пул,
+    # поэтому время прогона определяется самым медленным тестом, а не суммой.
+    pending = []
     for task in config["tasks"]:
-        if not task["id"].endswith("_refactor"):
-            print(f"🔍 Запуск тестов для {task['id']}")
-            run_behavioral_test(task)
-
-    # Запускаем проверки рефакторинга (если есть)
-    refactor_tasks = [
-        ("task_01_refactor", "tools/test_refactor_task_01.py", 20),
-        ("task_02_refactor", "tools/test_refactor_task_02.py", 20),
-    ]
-
-    for task_id, script, max_score in refactor_tasks:
-        print(f"🔍 Проверка рефакторинга: {task_id}")
-        if os.path.exists(script):
-            run_refactor_check(task_id, script, max_score)
+        if only is not None and task["id"] not in only:
+            continue
+        if "checker" in task:
+            pending.append((task["id"], "🔍 Проверка рефакторинга:",
+                            run_refactor_check(task, runner, executor, root)))
         else:
-            # Если скрипт не найден — создаём заглушку
-            results_dir = Path("results")
-            results_dir.mkdir(exist_ok=True)
-            stub = make_task_result_stub({
-                "id": task_id,
-                "max_score": max_score,
-                "tests": [{"name": "Проверка", "max_score": max_score}]
-            })
-            with open(results_dir / f"{task_id}.json", "w") as f:
-                json.dump(stub, f, ensure_ascii=False, indent=2)
-            print(f"⚠️ Скрипт {script} не найден — создан заглушка-результат")
+            pending.append((task["id"], "🔍 Запуск тестов для",
+                            run_behavioral_test(task, runner, executor, root, cache, jobs)))
+
+    # Результаты собираются в исходном порядке
+    results = {}
+    for task_id, title, finish in pending:
+        print(f"{title} {task_id}")
+        with tracing.span("wait_task", task=task_id):
+            results[task_id] = finish()
+    return results
+
+
+def add_arguments(parser):
+    """Параметры прогона тестов — общие для run_all_tests.py и grade.py"""
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="Число параллельно выполняемых тестов")
+    parser.add_argument("--runner", choices=RUNNERS, default="subprocess",
+                        help="Бэкенд запуска программ: subprocess или pool (предзапущенные процессы)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Не использовать кэш результатов поведенческих тестов")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Максимальный размер кэша в МБ")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Перепроверить только задачи, файлы которых изменились "
+                             "с последнего проверенного коммита")
+    parser.add_argument("--output-limit", type=int, default=DEFAULT_OUTPUT_LIMIT // 1024,
+                        help="Лимит вывода программы в КБ на каждый из stdout/stderr; "
+                             "при превышении программа завершается")
+    parser.add_argument("--watch", action="store_true",
+                        help="Следить за файлами задач и перепроверять их при сохранении")
+    tracing.add_arguments(parser)
+
+
+def make_cache(args):
+    if args.no_cache:
+        return None
+    return ResultCache(args.cache_dir, args.cache_size * 1024 * 1024, namespace="behavioral")
+
+
+def run_tests(config, args):
+    """Стадия прогона: проверяет задачи и пишет results/{task_id}.json.
+
+    Возвращает словарь {task_id: результат} только для проверенных задач —
+    в инкрементальном режиме остальные остаются на диске с прошлого прогона.
+    """
+    cache = make_cache(args)
+    jobs = max(1, args.jobs)
+    # Все проверки одного прогона запускают программы через общий журнал
+    runner = ExecutionLedger(make_runner(args.runner, jobs, args.output_limit * 1024))
+
+    only = None
+    if args.incremental:
+        only = incremental.affected_tasks(config)
+        if only is None:
+            print("🔁 Инкрементальный режим: нет базового коммита или изменена проверка — полный прогон")
+        for task in config["tasks"]:
+            if only is not None and task["id"] not in only:
+                print(f"⏭️ {task['id']}: файлы не менялись — результат перенесён")
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = grade_submission(config, runner, executor, cache=cache, only=only,
+                                       jobs=jobs)
+    finally:
+        runner.close()
+
+    for task_id, result_data in results.items():
+        write_result(task_id, result_data)
+
+    with tracing.span("save_state"):
+        commit = incremental.current_commit()
+        if commit and not incremental.has_local_changes(config):
+            incremental.save_state(commit)
+        else:
+            # Результаты незакоммиченных файлов не привязаны к коммиту
+            incremental.clear_state()
+
+    if cache is not None:
+        print(cache.stats_line())
+    print(f"♻️ Повторно использовано запусков программ: {runner.reused}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    args = parser.parse_args()
+    install_signal_handlers()
+
+    config_path = ".github/tasks.json"
+    if args.watch:
+        watch.watch(config_path, args)
+        return
+
+    with tracing.session("run_all_tests", args.trace, args.profile):
+        with tracing.span("load_config"):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        run_tests(config, args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
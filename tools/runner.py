@@ -0,0 +1,540 @@
+# tools/runner.py
+"""Бэкенды запуска студенческих программ.
+
+* subprocess — отдельный процесс python3 на каждый запуск (поведение по умолчанию);
+* pool — пул заранее запущенных процессов (forkserver). Каждый процесс пула
+  на запуск делает fork(), а дочерний процесс выполняет код задачи в чистом
+  пространстве имён с перенаправленными stdin/stdout/stderr. Так не тратится
+  время на старт интерпретатора.
+
+Оба бэкенда возвращают одинаковый словарь:
+{"returncode": int | None, "stdout": str, "stderr": str, "timed_out": bool,
+ "output_limited": bool, "mismatch": [строка, столбец] | None,
+ "wall_time": сек, "cpu_time": user+sys сек, "max_rss_kb": пиковый RSS}
+
+Процесс забирается через wait4, откуда берутся время CPU и пиковая память.
+Вывод читается потоково и не больше output_limit байт на поток: программа,
+превысившая лимит, убивается вместе с группой процессов
+(output_limited=True, returncode=None), поэтому память проверяющего на
+один запуск ограничена независимо от того, сколько печатает программа.
+
+Если передан expect, stdout сравнивается с ним по мере чтения
+(compare.StreamComparator). При первом расхождении программа убивается, а
+позиция расхождения записывается в "mismatch"; stdout в этом случае
+неполный. Если расхождений не было, "mismatch" равен None — итог
+сравнения определяет вызывающий код по полному выводу.
+
+Группы процессов работающих программ и пулы процессов учитываются в
+модуле: kill_all() убивает их при выходе проверяющего (atexit), а
+install_signal_handlers() — ещё и по SIGINT/SIGTERM, поэтому прерванная
+проверка не оставляет зациклившиеся программы работать дальше.
+"""
+import atexit
+import builtins
+import locale
+import multiprocessing
+import os
+import select
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import tracing
+from compare import StreamComparator
+from result_cache import file_digest
+
+RUNNERS = ("subprocess", "pool")
+
+CHUNK_SIZE = 64 * 1024
+
+# Лимит захватываемого вывода по умолчанию — на каждый из stdout и stderr
+DEFAULT_OUTPUT_LIMIT = 1024 * 1024
+
+
+# Группы процессов запущенных и ещё не забранных программ
+_live_groups = set()
+# RLock: kill_all может вызваться обработчиком сигнала в потоке, держащем блокировку
+_live_lock = threading.RLock()
+# ProcessPoolExecutor, процессы которых завершаются в kill_all
+_pools = weakref.WeakSet()
+
+
+def _kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def register_pool(executor):
+    """Процессы executor будут завершены в kill_all"""
+    _pools.add(executor)
+
+
+def kill_all():
+    """Убивает группы всех работающих программ и завершает процессы пулов"""
+    with _live_lock:
+        groups = list(_live_groups)
+        _live_groups.clear()
+    for pid in groups:
+        _kill_group(pid)
+    for executor in list(_pools):
+        # Без shutdown(): его блокировку может держать прерванный сигналом код.
+        # Пул с завершёнными процессами сломан, его закроет обычный shutdown.
+        # SIGTERM: процесс пула сам убивает свои программы (init_worker)
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            try:
+                process.terminate()
+            except (OSError, AttributeError):
+                pass
+
+
+atexit.register(kill_all)
+
+
+def install_signal_handlers():
+    """По SIGINT/SIGTERM сначала kill_all, затем прежнее поведение сигнала.
+
+    Вызывается из главного потока скрипта проверки.
+    """
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if previous == signal.SIG_IGN:
+            # Игнорируемый сигнал (nohup, фоновое задание) так и остаётся игнорируемым
+            continue
+
+        def handler(signum, frame, previous=previous):
+            kill_all()
+            if callable(previous):
+                previous(signum, frame)
+            else:
+                raise SystemExit(128 + signum)
+
+        signal.signal(signum, handler)
+
+
+def _exit_worker(signum, frame):
+    kill_all()
+    os._exit(128 + signum)
+
+
+def init_worker():
+    """initializer для ProcessPoolExecutor: процесс пула по SIGTERM убивает свои программы"""
+    # После fork() здесь копии программ и пулов родителя — они не наши
+    with _live_lock:
+        _live_groups.clear()
+    _pools.clear()
+    signal.signal(signal.SIGTERM, _exit_worker)
+
+
+def _completed(returncode, stdout, stderr, timed_out=False, output_limited=False,
+               mismatch=None, metrics=None):
+    result = {
+        "returncode": returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "timed_out": timed_out,
+        "output_limited": output_limited,
+        "mismatch": mismatch
+    }
+    result.update(metrics or {})
+    return result
+
+
+def _decode(data):
+    # Универсальные переводы строк — как у subprocess.run(text=True)
+    text = bytes(data).decode(locale.getpreferredencoding(False), errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _communicate(stdin_fd, stdout_fd, stderr_fd, data, deadline, limit=DEFAULT_OUTPUT_LIMIT,
+                 on_stdout=None):
+    """Передаёт data в stdin и читает stdout/stderr до EOF или дедлайна.
+
+    Из каждого потока сохраняется не больше limit байт; при превышении
+    чтение прекращается. Каждый прочитанный кусок stdout передаётся в
+    on_stdout, и если тот вернул False, чтение тоже прекращается.
+    Закрывает все три дескриптора. Возвращает
+    (stdout, stderr, timed_out, stopped), где stopped — чтение прервано
+    по лимиту или по on_stdout.
+    """
+    buffers = {stdout_fd: bytearray(), stderr_fd: bytearray()}
+    selector = selectors.DefaultSelector()
+    for fd in buffers:
+        selector.register(fd, selectors.EVENT_READ)
+    if data:
+        os.set_blocking(stdin_fd, False)
+        selector.register(stdin_fd, selectors.EVENT_WRITE)
+    else:
+        os.close(stdin_fd)
+    view = memoryview(data)
+    timed_out = stopped = False
+    try:
+        while selector.get_map() and not stopped:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in selector.select(remaining):
+                fd = key.fd
+                if fd == stdin_fd:
+                    try:
+                        written = os.write(fd, view[:CHUNK_SIZE])
+                    except BrokenPipeError:
+                        written = len(view)  # программа не читает ввод — это не ошибка
+                    except BlockingIOError:
+                        continue
+                    view = view[written:]
+                    if not view:
+                        selector.unregister(fd)
+                        os.close(fd)
+                    continue
+                buffer = buffers[fd]
+                # Читаем на байт больше остатка лимита, чтобы заметить превышение
+                chunk = os.read(fd, min(CHUNK_SIZE, limit - len(buffer) + 1))
+                if not chunk:
+                    selector.unregister(fd)
+                elif len(buffer) + len(chunk) > limit:
+                    buffer += chunk[:limit - len(buffer)]
+                    stopped = True
+                    break
+                else:
+                    buffer += chunk
+                    if fd == stdout_fd and on_stdout is not None and not on_stdout(chunk):
+                        stopped = True
+                        break
+    finally:
+        for key in list(selector.get_map().values()):
+            selector.unregister(key.fd)
+            os.close(key.fd)
+        for fd in buffers:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        selector.close()
+    return buffers[stdout_fd], buffers[stderr_fd], timed_out, stopped
+
+
+def _wait_child(pid, deadline):
+    """Ждёт завершения процесса до дедлайна через wait4.
+
+    Возвращает (status, rusage) или None по таймауту.
+    """
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            pidfd = None
+    try:
+        while True:
+            done, status, rusage = os.wait4(pid, os.WNOHANG)
+            if done:
+                return status, rusage
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if pidfd is not None:
+                select.select([pidfd], [], [], remaining)
+            else:
+                time.sleep(min(remaining, 0.005))
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def _collect(pid, started, stdin_fd, stdout_fd, stderr_fd, stdin, timeout,
+             output_limit=DEFAULT_OUTPUT_LIMIT, expect=None):
+    """Общая часть обоих бэкендов: обмен данными, ожидание и метрики.
+
+    Процесс должен быть лидером своей группы: по таймауту, превышению
+    лимита вывода или расхождению с expect убивается вся группа, включая
+    порождённые программой процессы.
+    """
+    deadline = started + timeout
+    data = (stdin or "").encode(locale.getpreferredencoding(False))
+    comparator = None if expect is None else StreamComparator(expect)
+    with _live_lock:
+        _live_groups.add(pid)
+    try:
+        out, err, timed_out, stopped = _communicate(
+            stdin_fd, stdout_fd, stderr_fd, data, deadline, output_limit,
+            comparator and comparator.feed_bytes)
+        mismatch = comparator.mismatch if comparator else None
+        output_limited = stopped and mismatch is None
+
+        waited = None if timed_out or stopped else _wait_child(pid, deadline)
+        if waited is None:
+            timed_out = not stopped
+            _kill_group(pid)
+            _, status, rusage = os.wait4(pid, 0)
+        else:
+            status, rusage = waited
+    except BaseException:
+        # Прерванная проверка (KeyboardInterrupt и т. п.) не оставляет программу работать
+        _kill_group(pid)
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+        raise
+    finally:
+        with _live_lock:
+            _live_groups.discard(pid)
+
+    metrics = {
+        "wall_time": round(time.monotonic() - started, 4),
+        "cpu_time": round(rusage.ru_utime + rusage.ru_stime, 4),
+        "max_rss_kb": rusage.ru_maxrss
+    }
+    returncode = None if timed_out or stopped else os.waitstatus_to_exitcode(status)
+    mismatch = list(mismatch) if mismatch else None
+    return _completed(returncode, _decode(out), _decode(err), timed_out, output_limited,
+                      mismatch, metrics)
+
+
+def _pipes():
+    """Три канала: (stdin_r, stdin_w), (stdout_r, stdout_w), (stderr_r, stderr_w)"""
+    return os.pipe(), os.pipe(), os.pipe()
+
+
+class SubprocessRunner:
+    """Запускает каждую программу отдельным процессом python3"""
+
+    executable = "python3"
+
+    def __init__(self, output_limit=DEFAULT_OUTPUT_LIMIT):
+        self.output_limit = output_limit
+
+    def run(self, task_file, stdin, timeout, cwd=None, expect=None):
+        (in_r, in_w), (out_r, out_w), (err_r, err_w) = _pipes()
+        started = time.monotonic()
+        try:
+            with tracing.span("spawn", file=task_file):
+                proc = subprocess.Popen(
+                    [self.executable, task_file],
+                    cwd=cwd,
+                    stdin=in_r,
+                    stdout=out_w,
+                    stderr=err_w,
+                    start_new_session=True
+                )
+        except BaseException:
+            for fd in (in_w, out_r, err_r):
+                os.close(fd)
+            raise
+        finally:
+            for fd in (in_r, out_w, err_w):
+                os.close(fd)
+
+        with tracing.span("collect", file=task_file):
+            result = _collect(proc.pid, started, in_w, out_r, err_r, stdin, timeout,
+                              self.output_limit, expect)
+        # Процесс уже забран через wait4 — сообщаем об этом Popen
+        proc.returncode = -signal.SIGKILL if result["returncode"] is None else result["returncode"]
+        return result
+
+    def close(self):
+        pass
+
+
+def _run_source(source, filename):
+    """Выполняет код как `python3 filename` и возвращает код завершения"""
+    namespace = {"__name__": "__main__", "__file__": filename, "__builtins__": builtins}
+    sys.argv = [filename]
+    sys.path[0] = os.path.dirname(os.path.abspath(filename))
+    try:
+        exec(compile(source, filename, "exec"), namespace)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Без кадра самого раннера — traceback как у обычного запуска
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        return 1
+    return 0
+
+
+def execute_forked(source, filename, stdin, timeout, cwd=None, output_limit=DEFAULT_OUTPUT_LIMIT,
+                   expect=None):
+    """Выполняет код в fork() текущего процесса.
+
+    Вызывается из однопоточного процесса: процесса пула или дочернего
+    процесса, уже выполняющего проверку.
+    """
+    encoding = locale.getpreferredencoding(False)
+    (in_r, in_w), (out_r, out_w), (err_r, err_w) = _pipes()
+    started = time.monotonic()
+
+    with tracing.span("fork", file=filename):
+        pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            os.setpgid(0, 0)
+            # Обработчики проверяющего программе не нужны
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            if cwd is not None:
+                os.chdir(cwd)
+            os.dup2(in_r, 0)
+            os.dup2(out_w, 1)
+            os.dup2(err_w, 2)
+            for fd in (in_r, in_w, out_r, out_w, err_r, err_w):
+                os.close(fd)
+            sys.stdin = open(0, "r", encoding=encoding, closefd=False)
+            sys.stdout = open(1, "w", encoding=encoding, closefd=False)
+            sys.stderr = open(2, "w", encoding=encoding, closefd=False)
+            code = _run_source(source, filename)
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            except BaseException:
+                pass
+            os._exit(code & 0xFF)
+
+    for fd in (in_r, out_w, err_w):
+        os.close(fd)
+    with tracing.span("collect", file=filename):
+        return _collect(pid, started, in_w, out_r, err_r, stdin, timeout, output_limit, expect)
+
+
+def _execute_traced(*args):
+    """execute_forked в процессе пула вместе с его интервалами трассировки"""
+    with tracing.capture() as events:
+        result = execute_forked(*args)
+    return result, events
+
+
+def _warmup():
+    return os.getpid()
+
+
+class PoolRunner:
+    """Пул предзапущенных процессов, выполняющих программы через fork()"""
+
+    # Программы выполняет интерпретатор проверяющего
+    executable = sys.executable
+
+    def __init__(self, workers, output_limit=DEFAULT_OUTPUT_LIMIT):
+        self.output_limit = output_limit
+        context = multiprocessing.get_context("forkserver")
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                             initializer=init_worker)
+        register_pool(self._executor)
+        for _ in range(workers):
+            self._executor.submit(_warmup)
+
+    def run(self, task_file, stdin, timeout, cwd=None, expect=None):
+        # Путь к файлу, как и у subprocess, задаётся относительно cwd
+        with open(os.path.join(cwd or ".", task_file), "rb") as f:
+            source = f.read()
+        args = (source, task_file, stdin, timeout, cwd, self.output_limit, expect)
+        with tracing.span("pool_run", file=task_file):
+            if not tracing.enabled():
+                return self._executor.submit(execute_forked, *args).result()
+            # Интервалы процесса пула иначе остались бы в нём
+            result, events = self._executor.submit(_execute_traced, *args).result()
+            tracing.merge(events)
+            return result
+
+    def close(self):
+        self._executor.shutdown()
+
+
+class ExecutionLedger:
+    """Журнал запусков за один прогон проверки.
+
+    Оборачивает бэкенд и запоминает результат каждого запуска по ключу
+    (хэш файла, stdin, каталог). Поведенческие тесты и проверки
+    рефакторинга с тем же вводом получают один и тот же запуск, поэтому
+    программа выполняется не больше одного раза на каждый ввод. Запуск,
+    остановленный по расхождению с expect, неполон — он не передаётся
+    другим вызовам и не запоминается.
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.reused = 0
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    @property
+    def executable(self):
+        return self.runner.executable
+
+    @property
+    def output_limit(self):
+        return self.runner.output_limit
+
+    def run(self, task_file, stdin, timeout, cwd=None, expect=None):
+        path = os.path.join(cwd or ".", task_file)
+        key = (file_digest(path), stdin or "", os.path.abspath(cwd or "."))
+        with self._lock:
+            recorded = self._runs.get(key)
+            # Запуск с меньшим таймаутом не заменяет запуск с большим
+            if recorded is not None and recorded[1] >= timeout:
+                future, owner = recorded[0], False
+                self.reused += 1
+            else:
+                future, owner = Future(), True
+                self._runs[key] = (future, timeout)
+
+        if owner:
+            try:
+                result = self.runner.run(task_file, stdin, timeout, cwd, expect)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                if result["mismatch"] is not None:
+                    with self._lock:
+                        if self._runs.get(key, (None,))[0] is future:
+                            del self._runs[key]
+                future.set_result(result)
+        result = dict(future.result())
+        if result["mismatch"] is not None and not owner:
+            # Чужой запуск был остановлен досрочно — выполняем свой
+            with self._lock:
+                self.reused -= 1
+            return self.run(task_file, stdin, timeout, cwd, expect)
+        if not result["timed_out"] and result["wall_time"] > timeout:
+            # С меньшим таймаутом этот запуск был бы прерван
+            result.update(returncode=None, timed_out=True)
+        return result
+
+    def close(self):
+        self.runner.close()
+
+
+def make_runner(name, workers=1, output_limit=DEFAULT_OUTPUT_LIMIT):
+    if name == "pool" and hasattr(os, "fork"):
+        return PoolRunner(workers, output_limit)
+    return SubprocessRunner(output_limit)
+
+
+def run_program(task_file, stdin, timeout):
+    """Однократный запуск программы бэкендом, выбранным в GRADER_RUNNER.
+
+    Используется скриптами проверки рефакторинга: при бэкенде pool они уже
+    работают в процессе пула, поэтому программа выполняется через fork().
+    """
+    if os.environ.get("GRADER_RUNNER") == "pool" and hasattr(os, "fork"):
+        with open(task_file, "rb") as f:
+            source = f.read()
+        return execute_forked(source, task_file, stdin, timeout)
+    return SubprocessRunner().run(task_file, stdin, timeout)
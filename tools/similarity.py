@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Индекс похожести сдач по AST.
+
+Использование:
+    python3 tools/similarity.py <root> [--task task_02] [--threshold 0.6]
+
+Каждый файл задачи разбирается в AST и превращается в последовательность
+токенов: типы узлов, идентификаторы, переименованные по порядку первого
+появления (v0, v1, ...), и константы, сведённые к корзинам (порядок
+величины числа, STR для строк). По k-граммам токенов строятся отпечатки
+с отбором winnowing, по отпечаткам — MinHash-сигнатура, а сигнатуры
+раскладываются в корзины LSH. Кандидатами считаются только сдачи,
+попавшие хотя бы в одну общую корзину, поэтому время почти линейно по
+числу сдач. Для кандидатов считается точное сходство Жаккара отпечатков.
+Сдачи, у которых меньше MIN_PRINTS отпечатков (пустые, не разбираемые или
+совпадающие с шаблоном), в корзины не попадают: их одинаковые сигнатуры
+свели бы все такие сдачи в одни корзины. Они выводятся отдельным списком.
+
+Индекс хранится в .grader_cache/similarity.json и обновляется
+инкрементально: заново разбираются только новые и изменённые файлы.
+Отпечатки стартового шаблона (файлы задач в текущем репозитории)
+исключаются, чтобы общий для всех код не давал ложных совпадений.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import math
+import os
+import sys
+from collections import defaultdict
+from itertools import combinations
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from grade_batch import discover_submissions
+from result_cache import DEFAULT_CACHE_DIR, file_digest
+
+KGRAM = 5
+WINDOW = 4
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Меньше отпечатков — сдача считается пустой или слишком короткой
+MIN_PRINTS = 3
+
+# Простое число Мерсенна 2**61 - 1 для универсального хэширования
+PRIME = (1 << 61) - 1
+# Параметры перестановок фиксированы, чтобы сохранённые сигнатуры оставались
+# сравнимыми между запусками
+PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % PRIME | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % PRIME)
+    for i in range(NUM_PERM)
+]
+
+INDEX_VERSION = 2
+
+
+def _constant_token(value):
+    if isinstance(value, bool) or value is None:
+        return repr(value)
+    if isinstance(value, (int, float, complex)):
+        magnitude = abs(value)
+        if not math.isfinite(magnitude):
+            # 1e999 и подобные литералы — бесконечность, у неё нет порядка
+            return "NUMINF"
+        bucket = 0 if magnitude == 0 else int(math.floor(math.log10(magnitude)))
+        return f"NUM{bucket}"
+    if isinstance(value, (str, bytes)):
+        return "STR"
+    return type(value).__name__
+
+
+def normalize(tree):
+    """Последовательность токенов AST с переименованными идентификаторами"""
+    names = {}
+    tokens = []
+
+    def rename(name):
+        if name not in names:
+            names[name] = f"v{len(names)}"
+        return names[name]
+
+    def visit(node):
+        tokens.append(type(node).__name__)
+        if isinstance(node, ast.Name):
+            tokens.append(rename(node.id))
+        elif isinstance(node, ast.arg):
+            tokens.append(rename(node.arg))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            tokens.append(rename(node.name))
+        elif isinstance(node, ast.Attribute):
+            tokens.append(node.attr)
+        elif isinstance(node, ast.Constant):
+            tokens.append(_constant_token(node.value))
+        for child in ast.iter_child_nodes(node):
+            # Контекст Load/Store не несёт информации о структуре
+            if not isinstance(child, ast.expr_context):
+                visit(child)
+
+    visit(tree)
+    return tokens
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def fingerprints(tokens, k=KGRAM, window=WINDOW):
+    """Отпечатки winnowing: минимальный хэш k-граммы в каждом окне"""
+    hashes = [_hash(" ".join(tokens[i:i + k])) for i in range(len(tokens) - k + 1)]
+    if len(hashes) <= window:
+        return set(hashes)
+    selected = set()
+    for i in range(len(hashes) - window + 1):
+        selected.add(min(hashes[i:i + window]))
+    return selected
+
+
+def minhash(prints):
+    if not prints:
+        return [PRIME] * NUM_PERM
+    return [min((a * h + b) % PRIME for h in prints) for a, b in PERMUTATIONS]
+
+
+def jaccard(first, second):
+    if not first and not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def file_fingerprints(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return fingerprints(normalize(ast.parse(f.read())))
+
+
+class SimilarityIndex:
+    """MinHash/LSH-индекс отпечатков сдач одной задачи"""
+
+    def __init__(self):
+        self.entries = {}   # имя -> {"digest", "prints", "signature"}
+        self.buckets = defaultdict(set)
+
+    def _bands(self, signature):
+        # Короткие сдачи хранятся без сигнатуры и в корзины не попадают
+        if signature is None:
+            return []
+        return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+    def remove(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            for key in self._bands(entry["signature"]):
+                self.buckets[key].discard(name)
+
+    def add(self, name, digest, prints):
+        """Добавляет (или заменяет) сдачу. Возвращает множество кандидатов"""
+        self.remove(name)
+        signature = minhash(prints) if len(prints) >= MIN_PRINTS else None
+        self.entries[name] = {"digest": digest, "prints": prints, "signature": signature}
+        candidates = set()
+        for key in self._bands(signature):
+            candidates |= self.buckets[key]
+            self.buckets[key].add(name)
+        return candidates
+
+    def short_entries(self):
+        """Имена пустых и слишком коротких сдач, не попавших в корзины"""
+        return sorted(name for name, e in self.entries.items() if e["signature"] is None)
+
+    def similar_pairs(self, threshold):
+        """[(сходство, имя1, имя2)] для кандидатов LSH со сходством ≥ threshold"""
+        seen = set()
+        pairs = []
+        for bucket in self.buckets.values():
+            for first, second in combinations(sorted(bucket), 2):
+                if (first, second) in seen:
+                    continue
+                seen.add((first, second))
+                score = jaccard(self.entries[first]["prints"], self.entries[second]["prints"])
+                if score >= threshold:
+                    pairs.append((score, first, second))
+        pairs.sort(key=lambda p: (-p[0], p[1], p[2]))
+        return pairs
+
+    def to_json(self):
+        return {name: {"digest": e["digest"], "prints": sorted(e["prints"]),
+                       "signature": e["signature"]}
+                for name, e in self.entries.items()}
+
+    @classmethod
+    def from_json(cls, data):
+        index = cls()
+        for name, entry in data.items():
+            index.entries[name] = {"digest": entry["digest"], "prints": set(entry["prints"]),
+                                   "signature": entry["signature"]}
+            for key in index._bands(entry["signature"]):
+                index.buckets[key].add(name)
+        return index
+
+
+def load_indexes(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != INDEX_VERSION:
+        return {}
+    return {task_id: SimilarityIndex.from_json(entries)
+            for task_id, entries in data["tasks"].items()}
+
+
+def save_indexes(path, indexes):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = {"version": INDEX_VERSION,
+            "tasks": {task_id: index.to_json() for task_id, index in indexes.items()}}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def update_index(index, submissions, task_file, base_prints=frozenset()):
+    """Добавляет новые и изменённые сдачи. Возвращает число переиндексированных"""
+    updated = 0
+    present = set()
+    # При смене шаблона отпечатки нужно пересчитать
+    base_id = hashlib.sha256(json.dumps(sorted(base_prints)).encode()).hexdigest()[:16]
+    for path in submissions:
+        name = os.path.basename(os.path.normpath(path))
+        file_path = os.path.join(path, task_file)
+        if not os.path.exists(file_path):
+            continue
+        present.add(name)
+        digest = f"{file_digest(file_path)}:{base_id}"
+        entry = index.entries.get(name)
+        if entry is not None and entry["digest"] == digest:
+            continue
+        try:
+            prints = file_fingerprints(file_path) - base_prints
+        except (SyntaxError, ValueError, UnicodeDecodeError, OverflowError, RecursionError):
+            # Одна неразбираемая сдача не должна останавливать весь поиск
+            prints = set()
+        index.add(name, digest, prints)
+        updated += 1
+    for name in set(index.entries) - present:
+        index.remove(name)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск похожих сдач по AST")
+    parser.add_argument("root", help="Каталог с клонированными репозиториями студентов")
+    parser.add_argument("--config", default=".github/tasks.json")
+    parser.add_argument("--task", action="append",
+                        help="Проверять только эти задачи (по умолчанию — все поведенческие)")
+    parser.add_argument("--threshold", type=float, default=0.6,
+                        help="Минимальное сходство Жаккара для вывода пары")
+    parser.add_argument("--index", default=os.path.join(DEFAULT_CACHE_DIR, "similarity.json"))
+    parser.add_argument("--no-base", action="store_true",
+                        help="Не исключать код стартового шаблона")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    submissions = discover_submissions(args.root, config)
+    indexes = load_indexes(args.index)
+    # Файл проверяется один раз, даже если на него ссылаются несколько задач
+    tasks = {}
+    for task in config["tasks"]:
+        if args.task is None or task["id"] in args.task:
+            tasks.setdefault(task["file"], task["id"])
+
+    short = {}
+    print("## 🔎 Похожие сдачи\n")
+    print("| Задание | Студент 1 | Студент 2 | Сходство |")
+    print("|---------|-----------|-----------|----------|")
+    for task_file, task_id in tasks.items():
+        base = set()
+        if not args.no_base and os.path.exists(task_file):
+            try:
+                base = file_fingerprints(task_file)
+            except (SyntaxError, ValueError, UnicodeDecodeError, OverflowError, RecursionError):
+                pass
+        index = indexes.setdefault(task_id, SimilarityIndex())
+        updated = update_index(index, submissions, task_file, base)
+        print(f"🔍 {task_id}: сдач {len(index.entries)}, переиндексировано {updated}",
+              file=sys.stderr)
+        for score, first, second in index.similar_pairs(args.threshold):
+            print(f"| {task_id} | {first} | {second} | {score:.0%} |")
+        if index.short_entries():
+            short[task_id] = index.short_entries()
+
+    if short:
+        print("\n### ⚪ Пустые или слишком короткие сдачи (не сравнивались)\n")
+        for task_id, names in short.items():
+            print(f"- {task_id}: {', '.join(names)}")
+
+    save_indexes(args.index, indexes)
+
+if __name__ == "__main__":
+    main()
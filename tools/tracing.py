@@ -0,0 +1,146 @@
+# tools/tracing.py
+"""Трассировка этапов проверки и профилирование.
+
+    with tracing.span("write_result", task=task_id):
+        ...
+
+Интервалы пишутся в формате Chrome trace (results/trace_<скрипт>.json),
+который открывается в chrome://tracing или https://ui.perfetto.dev.
+Трассировка включается флагом --trace или переменной окружения
+GRADER_TRACE=1. Когда она выключена, span() возвращает один и тот же
+пустой контекстный менеджер и почти ничего не стоит.
+
+Интервалы из процессов пула (runner.PoolRunner) собираются там через
+capture(), возвращаются вместе с результатом и добавляются в трассировку
+родителя через merge() — отдельной строкой с pid процесса пула.
+
+--profile запускает скрипт под cProfile: самые затратные функции
+печатаются в stderr и сохраняются в results/profile_<скрипт>.txt.
+"""
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+
+_enabled = bool(os.environ.get("GRADER_TRACE"))
+_events = []
+_origin = time.perf_counter()
+_NOOP = contextlib.nullcontext()
+
+PROFILE_LINES = 25
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        # list.append атомарен — блокировка между потоками не нужна
+        _events.append({
+            "name": self.name,
+            "ph": "X",
+            "ts": round((self.start - _origin) * 1e6, 1),
+            "dur": round((end - self.start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": self.args
+        })
+        return False
+
+
+def span(name, **args):
+    """Контекстный менеджер интервала трассировки"""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, args)
+
+
+@contextlib.contextmanager
+def capture():
+    """Собирает интервалы блока в список для передачи в другой процесс.
+
+    Трассировка в блоке включена. Собранные интервалы убираются из
+    трассировки этого процесса, их "ts" — абсолютное perf_counter():
+    часы монотонные и общие для процессов машины, merge() пересчитывает
+    их от начала трассировки родителя.
+    """
+    global _enabled
+    was_enabled = _enabled
+    _enabled = True
+    first = len(_events)
+    captured = []
+    try:
+        yield captured
+    finally:
+        _enabled = was_enabled
+        shift = _origin * 1e6
+        captured.extend(dict(event, ts=event["ts"] + shift) for event in _events[first:])
+        del _events[first:]
+
+
+def merge(events):
+    """Добавляет интервалы, собранные capture() в другом процессе"""
+    shift = _origin * 1e6
+    _events.extend(dict(event, ts=round(event["ts"] - shift, 1)) for event in events)
+
+
+def write(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": list(_events), "displayTimeUnit": "ms"}, f,
+                  ensure_ascii=False)
+
+
+def add_arguments(parser):
+    parser.add_argument("--trace", action="store_true",
+                        help="Записать трассировку этапов в results/trace_<скрипт>.json")
+    parser.add_argument("--profile", action="store_true",
+                        help="Запустить под cProfile и вывести самые затратные функции")
+
+
+@contextlib.contextmanager
+def session(name, trace=False, profile=False, results_dir="results"):
+    """Трассировка и профилирование всего запуска скрипта name"""
+    if trace:
+        enable()
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with span(name):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            os.makedirs(results_dir, exist_ok=True)
+            with open(os.path.join(results_dir, f"profile_{name}.txt"), "w", encoding="utf-8") as f:
+                f.write(out.getvalue())
+            print(out.getvalue(), file=sys.stderr)
+        if _enabled:
+            path = os.path.join(results_dir, f"trace_{name}.json")
+            write(path)
+            print(f"🧭 Трассировка: {path} ({len(_events)} интервалов)", file=sys.stderr)
@@ -1,8 +1,12 @@
 # tools/utils.py
 import json
 import base64
+import os
 import sys
 
+# Метрики запуска программы в записях тестов results/{task_id}.json
+METRIC_KEYS = ("wall_time", "cpu_time", "max_rss_kb")
+
 def decode_autograding_result(encoded_result):
     if not encoded_result or encoded_result in ('null', 'undefined', '', 'None'):
         return {'score': 0, 'max_score': 0, 'tests': []}
@@ -37,3 +41,54 @@ def make_task_result_stub(task_config):
         "tests": tests
     }
 
+
+def load_results(config, results=None, results_dir="results"):
+    """Результаты всех задач в порядке tasks.json.
+
+    Берутся из словаря results (если задача уже проверена в этом
+    процессе), иначе из results/{task_id}.json, иначе — заглушка.
+    С results_dir=None диск не читается.
+    """
+    loaded = {}
+    for task in config["tasks"]:
+        task_id = task["id"]
+        if results is not None and task_id in results:
+            loaded[task_id] = results[task_id]
+            continue
+        if results_dir is None:
+            loaded[task_id] = make_task_result_stub(task)
+            continue
+        json_path = os.path.join(results_dir, f"{task_id}.json")
+        if not os.path.exists(json_path):
+            print(f"⚠️ {json_path} missing — creating stub", file=sys.stderr)
+            loaded[task_id] = make_task_result_stub(task)
+        else:
+            with open(json_path, "r", encoding="utf-8") as f:
+                loaded[task_id] = json.load(f)
+    return loaded
+
+
+def resource_totals(result_data):
+    """Суммарные время и CPU и максимальная память по тестам задачи"""
+    tests = [t for t in result_data["tests"] if "wall_time" in t]
+    return {
+        "wall_time": round(sum(t["wall_time"] for t in tests), 4),
+        "cpu_time": round(sum(t["cpu_time"] for t in tests), 4),
+        "max_rss_kb": max((t["max_rss_kb"] for t in tests), default=0),
+        "measured": len(tests)
+    }
+
+def slowest_tests(results, limit=3):
+    """Самые долгие тесты: список (task_id, запись теста) по убыванию wall_time"""
+    timed = [(task_id, t) for task_id, data in results.items()
+             for t in data["tests"] if "wall_time" in t]
+    timed.sort(key=lambda item: item[1]["wall_time"], reverse=True)
+    return timed[:limit]
+
+
+def percentile(values, q):
+    """q-квантиль значений (по ближайшему рангу) с округлением, None для пустого списка"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
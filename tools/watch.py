@@ -0,0 +1,251 @@
+# tools/watch.py
+"""Режим наблюдения: перепроверка при каждом сохранении файла задачи.
+
+    python3 tools/run_all_tests.py --watch
+
+Файлы задач и скрипты проверки из tasks.json отслеживаются через inotify
+(ctypes, только Linux), а если он недоступен — опросом времени изменения.
+После сохранения перепроверяются только задачи, связанные с изменённым
+файлом. Журнал запусков, кэш разбора AST и кэш результатов живут всё
+время наблюдения, поэтому неизменившиеся программы повторно не
+запускаются. После каждой проверки таблица в терминале перерисовывается.
+
+Наблюдение начинается до первой проверки, поэтому сохранения во время
+неё не теряются. Если изменённый tasks.json не читается, остаётся
+прежняя конфигурация: перепроверяются только другие изменённые файлы, а
+если их нет — ничего до следующего сохранения.
+"""
+import contextlib
+import ctypes
+import ctypes.util
+import io
+import json
+import os
+import select
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from runner import ExecutionLedger, make_runner
+
+POLL_INTERVAL = 0.3
+# Редакторы сохраняют файл несколькими операциями — ждём, пока они закончатся
+DEBOUNCE = 0.05
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Опрос (mtime, размер) отслеживаемых файлов"""
+
+    def __init__(self, paths):
+        self.paths = set(paths)
+        self._state = {path: self._stat(path) for path in self.paths}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def wait(self):
+        """Блокируется до изменения и возвращает множество изменённых путей"""
+        while True:
+            changed = set()
+            for path in self.paths:
+                current = self._stat(path)
+                if current != self._state[path]:
+                    self._state[path] = current
+                    changed.add(path)
+            if changed:
+                return changed
+            time.sleep(POLL_INTERVAL)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """inotify на каталогах отслеживаемых файлов.
+
+    Следим за каталогами, а не за файлами: многие редакторы сохраняют
+    через запись во временный файл и переименование.
+    """
+
+    def __init__(self, paths):
+        self.paths = set(paths)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._dirs = {}
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        for directory in {os.path.dirname(path) or "." for path in self.paths}:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {directory}")
+            self._dirs[wd] = directory
+
+    def _read_events(self):
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            path = os.path.normpath(os.path.join(directory, name))
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    def wait(self):
+        while True:
+            select.select([self._fd], [], [])
+            changed = self._read_events()
+            while select.select([self._fd], [], [], DEBOUNCE)[0]:
+                changed |= self._read_events()
+            if changed:
+                return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(paths):
+    paths = [os.path.normpath(path) for path in paths]
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+def affected_by(config, changed):
+    """task_id задач, связанных с изменёнными файлами"""
+    only = set()
+    for task in config["tasks"]:
+        files = {os.path.normpath(task["file"])}
+        if "checker" in task:
+            files.add(os.path.normpath(task["checker"]))
+        if files & changed:
+            only.add(task["id"])
+    return only
+
+
+def watched_paths(config_path, config):
+    paths = {config_path} | {task["file"] for task in config["tasks"]}
+    paths |= {task["checker"] for task in config["tasks"] if "checker" in task}
+    return paths
+
+
+def draw(config, results, changed, elapsed, notice=None):
+    """Перерисовывает таблицу результатов в терминале"""
+    lines = ["\033[H\033[J"]
+    when = time.strftime("%H:%M:%S")
+    what = ", ".join(sorted(changed)) if changed else "первая проверка"
+    lines.append(f"👀 {when} — {what} ({elapsed:.2f} с). Ctrl+C — выход\n")
+    total = max_total = 0
+    for task in config["tasks"]:
+        data = results.get(task["id"])
+        if data is None:
+            continue
+        score = sum(t.get("score", 0) for t in data["tests"])
+        total += score
+        max_total += task["max_score"]
+        status = "✅" if score == task["max_score"] else ("⚠️" if score > 0 else "❌")
+        lines.append(f"{status} {task['name']:<50} {score:>3}/{task['max_score']}")
+        for test in data["tests"]:
+            if test.get("status") != "pass":
+                detail = test.get("output", "").replace("\n", "⏎")[:70]
+                mismatch = test.get("mismatch")
+                if test.get("reason"):
+                    detail += f" ({test['reason']})"
+                elif mismatch:
+                    detail += f" (строка {mismatch['line']}, столбец {mismatch['column']})"
+                lines.append(f"     ❌ {test['name']}: {detail}")
+    lines.append(f"\n🏆 {total}/{max_total}")
+    if notice:
+        lines.append(notice)
+    print("\n".join(lines), flush=True)
+
+
+def watch(config_path, args):
+    """Бесконечный цикл наблюдения; завершается по Ctrl+C"""
+    # run_all_tests сам импортирует этот модуль
+    from run_all_tests import grade_submission, make_cache, write_result
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    cache = make_cache(args)
+    jobs = max(1, args.jobs)
+    runner = ExecutionLedger(make_runner(args.runner, jobs, args.output_limit * 1024))
+    results = {}
+    only = None
+    changed = set()
+    notice = None
+    # Сохранения во время первой проверки тоже должны её перезапустить
+    watcher = make_watcher(watched_paths(config_path, config))
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while True:
+                started = time.monotonic()
+                # Журнал проверки заменяется таблицей
+                with contextlib.redirect_stdout(io.StringIO()):
+                    graded = grade_submission(config, runner, executor, cache=cache, only=only,
+                                              jobs=jobs)
+                for task_id, result_data in graded.items():
+                    write_result(task_id, result_data)
+                results.update(graded)
+                draw(config, results, changed, time.monotonic() - started, notice)
+
+                while True:
+                    changed = watcher.wait()
+                    only = affected_by(config, changed)
+                    if os.path.normpath(config_path) in changed:
+                        try:
+                            with open(config_path, "r", encoding="utf-8") as f:
+                                new_config = json.load(f)
+                            paths = watched_paths(config_path, new_config)
+                        except (OSError, ValueError, KeyError, TypeError) as e:
+                            # Файл могли сохранить на середине правки. Другие изменённые
+                            # файлы перепроверяются с прежней конфигурацией
+                            notice = (f"⚠️ {config_path} не прочитан ({type(e).__name__}: {e}) — "
+                                      f"используется прежняя версия")
+                            if not only:
+                                # Перепроверять нечего — ждём следующего сохранения
+                                print(notice, flush=True)
+                                continue
+                        else:
+                            notice = None
+                            config = new_config
+                            # Новые файлы задач тоже нужно отслеживать
+                            old, watcher = watcher, make_watcher(paths)
+                            old.close()
+                            results = {}
+                            only = None
+                    break
+    except KeyboardInterrupt:
+        print("\n👋 Наблюдение остановлено")
+    finally:
+        watcher.close()
+        runner.close()